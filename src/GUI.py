@@ -3,14 +3,53 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.io as pio
 
-def plot_median(values):
-    generations = np.arange(len(values))
-    values = np.array([np.pad(v, (0, max(map(len, values)) - len(v)), 'constant') for v in values])
-    median_values = np.median(values, axis=1)
+MAX_BOXES = 200
+MAX_POINTS = 2000
+
+# The HTML files reference a single plotly.min.js next to them instead of embedding it;
+# plotly copies the bundle there the first time a file is written to that directory.
+PLOTLY_JS = "directory"
+
+def write_html(fig, filename):
+    pio.write_html(fig, filename, include_plotlyjs=PLOTLY_JS)
+
+def bucket_generations(run, max_buckets):
+    """
+    Merges consecutive generations of a run so that at most `max_buckets` remain.
+    Each bucket keeps the minimum and maximum of its generations and the average of their
+    quartiles and means, which is an approximation of the quartiles of the merged values.
+    Args:
+        run (numpy.ndarray): The records of a run, as returned by `recorder.open_run`.
+        max_buckets (int): The maximum number of buckets.
+    Returns:
+        (dict): Arrays "first", "last", "min", "q1", "median", "q3", "max" and "mean", one
+                value per bucket ("first" and "last" are generation numbers).
+    """
+
+    size = max(1, -(-len(run) // max_buckets))
+    starts = np.arange(0, len(run), size)
+    generations = np.asarray(run["generation"])
+    counts = np.diff(np.append(starts, len(run)))
+
+    buckets = {
+        "first": generations[starts],
+        "last": generations[np.minimum(starts + size, len(run)) - 1],
+        "min": np.minimum.reduceat(np.asarray(run["min"]), starts),
+        "max": np.maximum.reduceat(np.asarray(run["max"]), starts),
+    }
+    for field in ("q1", "median", "q3", "mean"):
+        buckets[field] = np.add.reduceat(np.asarray(run[field]), starts) / counts
+    return buckets
+
+def plot_median(run, max_points=MAX_POINTS, show=True):
+    buckets = bucket_generations(run, max_points)
+    generations = buckets["first"]
+    mode = 'lines+markers' if len(generations) <= MAX_BOXES else 'lines'
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(x=generations, y=median_values, mode='lines+markers', name='Median', line=dict(color='red', width=2)))
+    fig.add_trace(go.Scatter(x=generations, y=buckets["median"], mode=mode, name='Median', line=dict(color='red', width=2)))
+    fig.add_trace(go.Scatter(x=generations, y=buckets["mean"], mode='lines', name='Mean', line=dict(color='blue', width=1, dash='dot')))
     
     fig.update_layout(
     title="Median",
@@ -19,16 +58,44 @@ def plot_median(values):
     showlegend=True
     )
 
-    pio.write_html(fig, "median.html")
+    write_html(fig, "median.html")
 
-    fig.show()
+    if show:
+        fig.show()
+
+def plot_dispersion(run, max_boxes=MAX_BOXES, sample_points=False, max_points=MAX_POINTS, show=True):
+    buckets = bucket_generations(run, max_boxes)
+    labels = [f'Gen {first}' if first == last else f'Gen {first}-{last}'
+              for first, last in zip(buckets["first"], buckets["last"])]
 
-def plot_dispersion(values):
-    
     fig = go.Figure()
 
-    for i, gen_values in enumerate(values):
-        fig.add_trace(go.Box(y=gen_values, name=f'Gen {i}', boxpoints='all', jitter=0.3, pointpos=-1.8))
+    # One box trace for all the generations, drawn from the recorded statistics, so the
+    # size of the HTML only depends on the number of boxes.
+    fig.add_trace(go.Box(
+        x=labels,
+        q1=buckets["q1"],
+        median=buckets["median"],
+        q3=buckets["q3"],
+        lowerfence=buckets["min"],
+        upperfence=buckets["max"],
+        mean=buckets["mean"],
+        name='Fitness'
+    ))
+
+    if sample_points:
+        # Every step-th generation contributes its recorded fitness sample.
+        samples = np.asarray(run["fitness_sample"])
+        step = max(1, -(-samples.size // max_points))
+        size = max(1, -(-len(run) // max_boxes))
+        rows = np.arange(0, len(run), step)
+        fig.add_trace(go.Scatter(
+            x=np.repeat([labels[row // size] for row in rows], samples.shape[1]),
+            y=samples[rows].ravel(),
+            mode='markers',
+            marker=dict(size=3, opacity=0.5),
+            name='Sampled individuals'
+        ))
 
     fig.update_layout(
         title="Dispersion",
@@ -37,129 +104,35 @@ def plot_dispersion(values):
         showlegend=True
     )
 
-    pio.write_html(fig, "dispersion.html")
-
-    fig.show()
-
-def plot_best_routes_animation(city_coordinates, best_routes, generations, best_distances):
-    x_coords, y_coords = zip(*city_coordinates.values())
-    city_names = list(city_coordinates.keys())
-
-    fig = go.Figure()
-
-    # Add initial scatter plot for cities
-    fig.add_trace(go.Scatter(
-        x=x_coords,
-        y=y_coords,
-        mode='markers+text',
-        marker=dict(size=20, color='red'),
-        text=city_names,
-        textposition="top center",
-        name="Cities"
-    ))
-
-    # Add initial line plot for the first route
-    initial_route = best_routes[0]
-    bcx_coords, bcy_coords = zip(*[city_coordinates[city] for city in initial_route])
-    fig.add_trace(go.Scatter(
-        x=bcx_coords,
-        y=bcy_coords,
-        mode='lines',
-        line=dict(color='green', width=2),
-        name="Best Route",
-        visible=True
-    ))
+    write_html(fig, "dispersion.html")
 
-    # Create frames for each generation
-    frames = []
-    for i, route in enumerate(best_routes):
-        bcx_coords, bcy_coords = zip(*[city_coordinates[city] for city in route])
-        frames.append(go.Frame(
-            data=[
-                go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='markers+text',
-                    marker=dict(size=20, color='red'),
-                    text=city_names,
-                    textposition="top center",
-                    name="Cities"
-                ),
-                go.Scatter(
-                    x=bcx_coords,
-                    y=bcy_coords,
-                    mode='lines',
-                    line=dict(color='green', width=2),
-                    name="Best Route",
-                    visible=True
-                )
-            ],
-            name=f"frame{i}",
-            layout=go.Layout(
-                title=f"TSP Solution - Generation {generations[i]} | Distance: {best_distances[i]:.2f}"
-            )
-        ))
+    if show:
+        fig.show()
 
-    fig.update_layout(
-        updatemenus=[
-            {
-                "type": "buttons",
-                "showactive": True,
-                "buttons": [
-                    {
-                        "args": [None, {"frame": {"duration": 500, "redraw": True}, "fromcurrent": True, "transition": {"duration": 300, "easing": "quadratic-in-out"}}],
-                        "label": "Play",
-                        "method": "animate"
-                    },
-                    {
-                        "args": [[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "transition": {"duration": 0}}],
-                        "label": "Pause",
-                        "method": "animate"
-                    },
-                ],
-                "direction": "left",
-                "pad": {"r": 10},
-                "x": -0.1,
-                "xanchor": "left",
-                "y": 0.5,
-                "yanchor": "middle"
-            }
-        ],
-        sliders=[{
-            "steps": [
-                {
-                    "args": [
-                        [f"frame{i}"],
-                        {
-                            "frame": {"duration": 300, "redraw": True},
-                            "mode": "immediate",
-                            "transition": {"duration": 300}
-                        }
-                    ],
-                    "label": f"{generations[i]}",
-                    "method": "animate"
-                }
-                for i in range(len(frames))
-            ],
-            "x": 0.1,
-            "len": 0.9,
-            "xanchor": "left",
-            "y": -0.3,
-            "yanchor": "top",
-            "pad": {"b": 10},
-            "transition": {"duration": 300, "easing": "cubic-in-out"}
-        }]
-    )
-
-    fig.update(frames=frames)
-    
-    pio.write_html(fig, "best_chromosome.html")
+def route_coordinates(city_coordinates, route):
+    return tuple(zip(*[city_coordinates[city] for city in route]))
 
-    fig.show()
+def plot_routes_animation(city_coordinates, routes, generations, filename="routes.html", show=True):
+    """
+    Builds one animation of one or more routes across the generations of a run.
+    The city markers are drawn once; every frame only carries the coordinates of the route
+    traces it updates, and generations where none of the routes changed get no frame.
+    Args:
+        city_coordinates (dict): Maps each city name to its (x, y) position.
+        routes (list of tuples): One (label, routes, distances, color) tuple per animated route,
+                                 where routes[i] is the list of city names at generations[i].
+        generations (list of int): The generation numbers.
+        filename (str): The HTML file to write.
+        show (bool): Whether to open the figure, False in headless runs.
+    """
 
-def plot_worst_routes_animation(city_coordinates, worst_routes, generations, worst_distances):
     x_coords, y_coords = zip(*city_coordinates.values())
     city_names = list(city_coordinates.keys())
+    route_traces = list(range(1, len(routes) + 1))
+
+    def frame_title(i):
+        distances = " | ".join(f"{label}: {distances[i]:.2f}" for label, _, distances, _ in routes)
+        return f"TSP Solution - Generation {generations[i]} | Distance: {distances}"
 
     fig = go.Figure()
 
@@ -174,49 +147,40 @@ def plot_worst_routes_animation(city_coordinates, worst_routes, generations, wor
         name="Cities"
     ))
 
-    # Add initial line plot for the first route
-    initial_route = worst_routes[0]
-    bcx_coords, bcy_coords = zip(*[city_coordinates[city] for city in initial_route])
-    fig.add_trace(go.Scatter(
-        x=bcx_coords,
-        y=bcy_coords,
-        mode='lines',
-        line=dict(color='orange', width=2),
-        name="Worst Route",
-        visible=True
-    ))
+    # Add initial line plot for the first route of each series
+    for label, series, _, color in routes:
+        bcx_coords, bcy_coords = route_coordinates(city_coordinates, series[0])
+        fig.add_trace(go.Scatter(
+            x=bcx_coords,
+            y=bcy_coords,
+            mode='lines',
+            line=dict(color=color, width=2),
+            name=f"{label} Route",
+            visible=True
+        ))
 
-    # Create frames for each generation
+    # Create frames only for the generations where a route changed
     frames = []
-    for i, route in enumerate(worst_routes):
-        bcx_coords, bcy_coords = zip(*[city_coordinates[city] for city in route])
+    previous = None
+    for i, generation in enumerate(generations):
+        current = [tuple(series[i]) for _, series, _, _ in routes]
+        if current == previous:
+            continue
+        previous = current
+
+        data = []
+        for route in current:
+            bcx_coords, bcy_coords = route_coordinates(city_coordinates, route)
+            data.append(go.Scatter(x=bcx_coords, y=bcy_coords))
         frames.append(go.Frame(
-            data=[
-                go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='markers+text',
-                    marker=dict(size=20, color='red'),
-                    text=city_names,
-                    textposition="top center",
-                    name="Cities"
-                ),
-                go.Scatter(
-                    x=bcx_coords,
-                    y=bcy_coords,
-                    mode='lines',
-                    line=dict(color='orange', width=2),
-                    name="Worst Route",
-                    visible=True
-                )
-            ],
-            name=f"frame{i}",
-            layout=go.Layout(
-                title=f"TSP Solution - Generation {generations[i]} | Distance: {worst_distances[i]:.2f}"
-            )
+            data=data,
+            traces=route_traces,
+            name=f"frame{generation}",
+            layout=go.Layout(title=frame_title(i))
         ))
 
     fig.update_layout(
+        title=frame_title(0),
         updatemenus=[
             {
                 "type": "buttons",
@@ -245,17 +209,17 @@ def plot_worst_routes_animation(city_coordinates, worst_routes, generations, wor
             "steps": [
                 {
                     "args": [
-                        [f"frame{i}"],
+                        [frame.name],
                         {
                             "frame": {"duration": 300, "redraw": True},
                             "mode": "immediate",
                             "transition": {"duration": 300}
                         }
                     ],
-                    "label": f"{generations[i]}",
+                    "label": frame.name[len("frame"):],
                     "method": "animate"
                 }
-                for i in range(len(frames))
+                for frame in frames
             ],
             "x": 0.1,
             "len": 0.9,
@@ -269,122 +233,19 @@ def plot_worst_routes_animation(city_coordinates, worst_routes, generations, wor
 
     fig.update(frames=frames)
     
-    pio.write_html(fig, "worst_chromosome.html")
+    write_html(fig, filename)
 
-    fig.show()
-
-def plot_median_routes_animation(city_coordinates, median_routes, generations, median_distances):
-    x_coords, y_coords = zip(*city_coordinates.values())
-    city_names = list(city_coordinates.keys())
-
-    fig = go.Figure()
+    if show:
+        fig.show()
 
-    # Add initial scatter plot for cities
-    fig.add_trace(go.Scatter(
-        x=x_coords,
-        y=y_coords,
-        mode='markers+text',
-        marker=dict(size=20, color='red'),
-        text=city_names,
-        textposition="top center",
-        name="Cities"
-    ))
-
-    # Add initial line plot for the first route
-    initial_route = median_routes[0]
-    bcx_coords, bcy_coords = zip(*[city_coordinates[city] for city in initial_route])
-    fig.add_trace(go.Scatter(
-        x=bcx_coords,
-        y=bcy_coords,
-        mode='lines',
-        line=dict(color='blue', width=2),
-        name="Median Route",
-        visible=True
-    ))
-
-    # Create frames for each generation
-    frames = []
-    for i, route in enumerate(median_routes):
-        bcx_coords, bcy_coords = zip(*[city_coordinates[city] for city in route])
-        frames.append(go.Frame(
-            data=[
-                go.Scatter(
-                    x=x_coords,
-                    y=y_coords,
-                    mode='markers+text',
-                    marker=dict(size=20, color='red'),
-                    text=city_names,
-                    textposition="top center",
-                    name="Cities"
-                ),
-                go.Scatter(
-                    x=bcx_coords,
-                    y=bcy_coords,
-                    mode='lines',
-                    line=dict(color='blue', width=2),
-                    name="Median Route",
-                    visible=True
-                )
-            ],
-            name=f"frame{i}",
-            layout=go.Layout(
-                title=f"TSP Solution - Generation {generations[i]} | Distance: {median_distances[i]:.2f}"
-            )
-        ))
-
-    fig.update_layout(
-        updatemenus=[
-            {
-                "type": "buttons",
-                "showactive": True,
-                "buttons": [
-                    {
-                        "args": [None, {"frame": {"duration": 500, "redraw": True}, "fromcurrent": True, "transition": {"duration": 300, "easing": "quadratic-in-out"}}],
-                        "label": "Play",
-                        "method": "animate"
-                    },
-                    {
-                        "args": [[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "transition": {"duration": 0}}],
-                        "label": "Pause",
-                        "method": "animate"
-                    },
-                ],
-                "direction": "left",
-                "pad": {"r": 10},
-                "x": -0.1,
-                "xanchor": "left",
-                "y": 0.5,
-                "yanchor": "middle"
-            }
-        ],
-        sliders=[{
-            "steps": [
-                {
-                    "args": [
-                        [f"frame{i}"],
-                        {
-                            "frame": {"duration": 300, "redraw": True},
-                            "mode": "immediate",
-                            "transition": {"duration": 300}
-                        }
-                    ],
-                    "label": f"{generations[i]}",
-                    "method": "animate"
-                }
-                for i in range(len(frames))
-            ],
-            "x": 0.1,
-            "len": 0.9,
-            "xanchor": "left",
-            "y": -0.3,
-            "yanchor": "top",
-            "pad": {"b": 10},
-            "transition": {"duration": 300, "easing": "cubic-in-out"}
-        }]
-    )
+def plot_best_routes_animation(city_coordinates, best_routes, generations, best_distances, show=True):
+    plot_routes_animation(city_coordinates, [("Best", best_routes, best_distances, 'green')],
+                          generations, "best_chromosome.html", show)
 
-    fig.update(frames=frames)
-    
-    pio.write_html(fig, "med_chromosome.html")
+def plot_worst_routes_animation(city_coordinates, worst_routes, generations, worst_distances, show=True):
+    plot_routes_animation(city_coordinates, [("Worst", worst_routes, worst_distances, 'orange')],
+                          generations, "worst_chromosome.html", show)
 
-    fig.show()
\ No newline at end of file
+def plot_median_routes_animation(city_coordinates, median_routes, generations, median_distances, show=True):
+    plot_routes_animation(city_coordinates, [("Median", median_routes, median_distances, 'blue')],
+                          generations, "med_chromosome.html", show)
@@ -0,0 +1,193 @@
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+import numpy as np
+from utils import evaluate_chromosome, evaluate_population, generate_population
+from population import Population
+from memo import FitnessMemo
+from selection import fitness_proportionate_selection, tournament_selection, best_performer_selection
+from crossover import CROSSOVER_OPERATORS
+from mutation import MUTATION_OPERATORS, mutate
+from instances import coordinates_distance_matrix
+from ga import next_generation
+from local_search import local_search, nearest_neighbors
+
+SIZES = (14, 100, 1000, 5000)
+POP_SIZES = (50, 200)
+MIN_TIME = 0.2
+REPEAT = 3
+GENERATIONS = 5
+TOLERANCE = 0.10
+# The per-gene Python loop of discrete crossover is only timed up to this size.
+DISCRETE_CROSSOVER_MAX_SIZE = 1000
+
+def measure(function, min_time=MIN_TIME, repeat=REPEAT):
+    """
+    Times a function and tracks the peak memory it allocates.
+    The function is called in batches until a batch lasts at least `min_time` seconds; the
+    best time per call over `repeat` batches is kept. Peak memory is measured on a separate
+    call, with tracemalloc (NumPy reports its buffers to it), so tracing does not slow
+    down the timed calls.
+    Returns:
+        tuple: The seconds per call and the peak number of bytes allocated by one call.
+    """
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = 1
+    while True:
+        start = perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time or calls >= 1 << 20:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        start = perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (perf_counter() - start) / calls)
+    return best, peak
+
+def benchmark_instance(n, pop_size, seed=0, min_time=MIN_TIME, repeat=REPEAT, generations=GENERATIONS):
+    """
+    Benchmarks every component, and a few whole generations, on a random instance.
+    Args:
+        n (int): The number of cities.
+        pop_size (int): The population size.
+        seed (int): The seed of the instance and of the operators.
+        min_time (float): The minimum duration of a timed batch, in seconds.
+        repeat (int): The number of timed batches.
+        generations (int): The number of generations of the end-to-end benchmark.
+    Returns:
+        (list of dict): One result per component.
+    """
+
+    rng = np.random.default_rng(seed)
+    distance_matrix = coordinates_distance_matrix(rng.random((n, 2)) * 10000)
+    chromosomes = generate_population(pop_size, n, rng)
+    population = Population.from_chromosomes(chromosomes, distance_matrix)
+    results = []
+
+    def add(name, function, work, unit):
+        seconds, peak = measure(function, min_time, repeat)
+        results.append({
+            "name": name,
+            "n": n,
+            "pop_size": pop_size,
+            "seconds": seconds,
+            "throughput": work / seconds if seconds > 0 else float("inf"),
+            "unit": unit,
+            "peak_memory_bytes": peak,
+        })
+
+    add("evaluate_chromosome", lambda: evaluate_chromosome(chromosomes[0], distance_matrix), 1, "evaluations/s")
+    add("evaluate_population", lambda: evaluate_population(chromosomes, distance_matrix), pop_size, "evaluations/s")
+    # Every tour is already in the memo: the cost of hashing and looking up instead of evaluating.
+    memo = FitnessMemo()
+    Population.from_chromosomes(chromosomes, distance_matrix, memo)
+    add("evaluation.memo_hits", lambda: Population.from_chromosomes(chromosomes, distance_matrix, memo),
+        pop_size, "evaluations/s")
+
+    add("selection.fitness_proportionate", lambda: fitness_proportionate_selection(population, pop_size, rng),
+        pop_size, "selections/s")
+    add("selection.tournament", lambda: tournament_selection(population, pop_size, 3, rng), pop_size, "selections/s")
+    add("selection.best_performer", lambda: best_performer_selection(population), pop_size, "individuals/s")
+
+    for name, crossover in CROSSOVER_OPERATORS.items():
+        if name == "discrete" and n > DISCRETE_CROSSOVER_MAX_SIZE:
+            continue
+        add("crossover." + name, lambda crossover=crossover: crossover(chromosomes, rng), pop_size, "offspring/s")
+
+    for name in MUTATION_OPERATORS:
+        # Every individual is mutated, on a copy so the benchmark population stays the same.
+        add("mutation." + name,
+            lambda name=name: mutate(Population(chromosomes.copy(), population.fitness.copy()),
+                                     1.0, distance_matrix, name, rng),
+            pop_size, "mutations/s")
+
+    # Memetic step on offspring of the population, on copies so every call starts from the same tours.
+    neighbors = nearest_neighbors(distance_matrix)
+    offspring = Population.from_chromosomes(CROSSOVER_OPERATORS["ox"](chromosomes, rng), distance_matrix)
+    add("local_search",
+        lambda: local_search(Population(offspring.chromosomes.copy(), offspring.fitness.copy()),
+                             distance_matrix, neighbors),
+        pop_size, "individuals/s")
+
+    def run_generations():
+        current = population
+        for _ in range(generations):
+            current = next_generation(current, distance_matrix, rng, pop_size)
+
+    add("ga.generations", run_generations, generations, "generations/s")
+    return results
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compares results with a saved baseline.
+    Returns:
+        (list of dict): The results whose throughput dropped by more than `tolerance`, with
+                        the baseline throughput and the relative change.
+    """
+
+    reference = {(r["name"], r["n"], r["pop_size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = (result["name"], result["n"], result["pop_size"])
+        if key not in reference:
+            continue
+        change = result["throughput"] / reference[key]["throughput"] - 1
+        if change < -tolerance:
+            regressions.append(dict(result, baseline_throughput=reference[key]["throughput"], change=change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GA operators and the GA loop.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="numbers of cities")
+    parser.add_argument("--pop-sizes", type=int, nargs="+", default=list(POP_SIZES), help="population sizes")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="minimum seconds per timed batch")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed batches per component")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="relative throughput drop reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.sizes:
+        for pop_size in args.pop_sizes:
+            for result in benchmark_instance(n, pop_size, min_time=args.min_time, repeat=args.repeat):
+                results.append(result)
+                print("{name:<34} n={n:<6} pop={pop_size:<5} {throughput:>14.1f} {unit:<16} "
+                      "peak {peak_memory_bytes:>12,d} B".format(**result))
+
+    report = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for r in regressions:
+            print("REGRESSION {name} n={n} pop={pop_size}: {throughput:.1f} vs {baseline_throughput:.1f} "
+                  "{unit} ({change:+.1%})".format(**r))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import json
+import os
+from time import perf_counter
+import numpy as np
+from population import Population
+from termination import Incumbent
+
+CHECKPOINT_VERSION = 1
+
+def save_checkpoint(path, population, rng, incumbent, run_records=0):
+    """
+    Writes the state of a run to a `.npz` file, atomically.
+    The arrays are written to a temporary file next to `path`, which is synced and then
+    renamed over `path`, so a crash leaves either the previous checkpoint or the new one.
+    The fitness memo (`memo.FitnessMemo`) is not saved: a resumed run starts with an empty
+    memo. It finds the same tours as an uninterrupted run, but evaluates again the tours the
+    memo would have known, so its `Incumbent.evaluations` (and an `EvaluationBudget`) can
+    run ahead of the uninterrupted run's.
+    Args:
+        path (str): The path of the checkpoint, ending in `.npz`.
+        population (Population): The current population, with its cached fitness.
+        rng (numpy.random.Generator): The generator of the run; its full bit generator state is saved.
+        incumbent (Incumbent): The best tour and the counters of the run.
+        run_records (int): The number of records in the run file when the checkpoint was taken.
+    """
+
+    best_tour = incumbent.best_tour if incumbent.best_tour is not None else np.zeros(0, dtype=np.int32)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        np.savez(file,
+                 version=CHECKPOINT_VERSION,
+                 chromosomes=population.chromosomes,
+                 fitness=population.fitness,
+                 rng_state=json.dumps(rng.bit_generator.state),
+                 generations=incumbent.generations,
+                 evaluations=incumbent.evaluations,
+                 improved_at=incumbent.improved_at,
+                 elapsed=incumbent.elapsed,
+                 best_tour=best_tour,
+                 best_fitness=incumbent.best_fitness,
+                 run_records=run_records)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def load_checkpoint(path):
+    """
+    Reads a checkpoint written by `save_checkpoint`.
+    Returns:
+        tuple: The Population, a numpy.random.Generator in the saved state, the Incumbent
+               (whose clock continues from the saved elapsed time) and the number of run
+               file records covered by the checkpoint. The fitness memo is not restored.
+    """
+
+    with np.load(path) as data:
+        if int(data["version"]) != CHECKPOINT_VERSION:
+            raise ValueError("Unsupported checkpoint version: " + str(data["version"]))
+
+        state = json.loads(str(data["rng_state"]))
+        rng = np.random.Generator(getattr(np.random, state["bit_generator"])())
+        rng.bit_generator.state = state
+
+        incumbent = Incumbent()
+        incumbent.generations = int(data["generations"])
+        incumbent.evaluations = int(data["evaluations"])
+        incumbent.improved_at = int(data["improved_at"])
+        incumbent.start = perf_counter() - float(data["elapsed"])
+        if len(data["best_tour"]):
+            incumbent.best_tour = data["best_tour"]
+            incumbent.best_fitness = data["best_fitness"][()]
+
+        population = Population(data["chromosomes"], data["fitness"])
+        return population, rng, incumbent, int(data["run_records"])
+
+class Checkpointer:
+    """
+    Saves a checkpoint every `every_generations` generations and/or every `every_seconds` seconds.
+    Pass it to `ga.evolve`, which calls it after each generation has been consumed, so the
+    recorder already holds that generation's record. The recorder is flushed before saving, so
+    the run file always contains every record the checkpoint refers to.
+    Attributes:
+        path (str): The path of the checkpoint.
+        saved (int): The number of checkpoints written.
+    """
+
+    def __init__(self, path, rng, recorder=None, every_generations=None, every_seconds=None):
+        self.path = path
+        self.rng = rng
+        self.recorder = recorder
+        self.every_generations = every_generations
+        self.every_seconds = every_seconds
+        self.last_time = perf_counter()
+        self.saved = 0
+
+    def __call__(self, population, incumbent):
+        due = self.every_generations and incumbent.generations % self.every_generations == 0
+        due = due or (self.every_seconds is not None and perf_counter() - self.last_time >= self.every_seconds)
+        if due:
+            self.save(population, incumbent)
+
+    def save(self, population, incumbent):
+        run_records = 0
+        if self.recorder is not None:
+            self.recorder.flush()
+            run_records = self.recorder.records
+        save_checkpoint(self.path, population, self.rng, incumbent, run_records)
+        self.last_time = perf_counter()
+        self.saved += 1
@@ -0,0 +1,274 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import main
+
+# The GA parameters a config can set; the defaults are the constants of main.py.
+PARAMETERS = main.PARAMETERS
+DEFAULT_CONFIG = main.default_config()
+REPEATS = 1
+SAMPLES = 10
+
+_problems = {}
+
+def load_problem(instance, instance_matrix=None, instance_format=None):
+    """
+    Loads an instance once per process; sweep runs on the same instance share it.
+    """
+
+    key = (instance, instance_matrix, instance_format)
+    if key not in _problems:
+        _problems[key] = main.load_problem(instance, instance_matrix, instance_format)
+    return _problems[key]
+
+def solve(config, seed=None):
+    """
+    Runs the GA once, headless and without recording, with the given parameters.
+    Args:
+        config (dict): Values for the keys of PARAMETERS; missing keys use DEFAULT_CONFIG.
+        seed: Anything accepted by numpy.random.default_rng, e.g. a SeedSequence. Defaults to
+              config["seed"].
+    Returns:
+        (dict): The best fitness and tour, the number of generations and evaluations, the
+                elapsed seconds and the reason the run stopped.
+    """
+
+    config = dict(DEFAULT_CONFIG, **config)
+    problem = load_problem(config["instance"], config["instance_matrix"], config["instance_format"])
+    problem, incumbent = main.run(config, seed, problem)
+
+    best_tour, best_fitness = incumbent.best()
+    return {
+        "best_fitness": float(best_fitness),
+        "generations": incumbent.generations,
+        "evaluations": incumbent.evaluations,
+        "seconds": incumbent.elapsed,
+        "stop_reason": incumbent.stop_reason,
+        "best_tour": problem.to_names(best_tour),
+    }
+
+def _solve_run(run):
+    # Process pool entry point: a (run index, parameters, config, seed sequence) tuple.
+    index, parameters, config, seed = run
+    return index, parameters, solve(config, seed)
+
+def parse_value(text):
+    """
+    Parses a command line value as JSON (numbers, true/false, null, lists), or keeps it as a string.
+    """
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def parse_assignment(text):
+    if "=" not in text:
+        raise argparse.ArgumentTypeError("expected name=value, got " + text)
+    name, value = text.split("=", 1)
+    if name not in PARAMETERS:
+        raise argparse.ArgumentTypeError("unknown parameter " + name + "; expected one of " + ", ".join(PARAMETERS))
+    return name, value
+
+def grid_points(grid):
+    """
+    Returns every combination of the parameter values, as a list of dicts.
+    Args:
+        grid (dict): Maps each parameter to the list of its values.
+    """
+
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def _multiples(spec):
+    # The smallest and the largest multiple of the step within a range.
+    step = spec["step"]
+    return math.ceil(spec["min"] / step) * step, math.floor(spec["max"] / step) * step
+
+def random_points(space, samples, rng):
+    """
+    Draws parameter combinations at random.
+    Args:
+        space (dict): Maps each parameter to a list of choices, or to a range
+                      {"min": a, "max": b} with the optional flags "log" (sample log-uniformly)
+                      and "integer" (round to an integer), and an optional "step" (round to the
+                      nearest multiple of it within the range, e.g. 2 to keep pop_size even).
+        samples (int): The number of combinations to draw.
+        rng (numpy.random.Generator): The random number generator to use.
+    Returns:
+        (list of dict): The combinations.
+    Raises:
+        ValueError: If a range with a step has no multiple of the step.
+    """
+
+    for name, spec in space.items():
+        if isinstance(spec, dict) and spec.get("step"):
+            first, last = _multiples(spec)
+            if first > last:
+                raise ValueError("no multiple of " + str(spec["step"]) + " between " + str(spec["min"])
+                                 + " and " + str(spec["max"]) + " for " + name)
+
+    points = []
+    for _ in range(samples):
+        point = {}
+        for name, spec in space.items():
+            if isinstance(spec, dict):
+                low, high = spec["min"], spec["max"]
+                if spec.get("log"):
+                    value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                else:
+                    value = float(rng.uniform(low, high))
+                if spec.get("step"):
+                    first, last = _multiples(spec)
+                    value = min(max(round(value / spec["step"]) * spec["step"], first), last)
+                point[name] = int(round(value)) if spec.get("integer") else value
+            else:
+                point[name] = spec[rng.integers(len(spec))]
+        points.append(point)
+    return points
+
+def run_sweep(config, points, repeats=REPEATS, seed=None, workers=None):
+    """
+    Runs the GA for every parameter combination, `repeats` times each, on a process pool.
+    Every run gets its own seed, spawned from `seed` with numpy.random.SeedSequence, so a
+    sweep is reproducible and independent of the number of workers.
+    Args:
+        config (dict): The base parameters.
+        points (list of dict): The parameter combinations; each one overrides `config`.
+        repeats (int): The number of runs per combination.
+        seed (int or numpy.random.SeedSequence): The root seed of the sweep.
+        workers (int): The number of worker processes, defaults to the number of CPUs.
+    Returns:
+        (list of dict): One row per run, with the swept parameters, the run index, the results
+                        of `solve`, and the entropy and spawn key of its seed: the run can be
+                        repeated with `solve(config, SeedSequence(entropy, spawn_key=spawn_key))`.
+    """
+
+    runs = [(point, repeat) for point in points for repeat in range(repeats)]
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = root.spawn(len(runs))
+    jobs = [(index, point, dict(config, **point), seeds[index]) for index, (point, _) in enumerate(runs)]
+
+    rows = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, point, result in executor.map(_solve_run, jobs):
+            rows[index] = dict(point, run=index, entropy=root.entropy, spawn_key=list(seeds[index].spawn_key), **result)
+    return rows
+
+def aggregate(rows, parameters):
+    """
+    Groups the runs by their swept parameters and summarizes the best fitness of each group.
+    Returns:
+        (list of dict): One row per combination, sorted by mean best fitness.
+    """
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(json.dumps(row.get(name)) for name in parameters), []).append(row)
+
+    table = []
+    for key, group in groups.items():
+        fitness = np.array([row["best_fitness"] for row in group])
+        table.append(dict(
+            {name: group[0].get(name) for name in parameters},
+            runs=len(group),
+            mean=fitness.mean(),
+            std=fitness.std(),
+            best=fitness.min(),
+            generations=np.mean([row["generations"] for row in group]),
+            seconds=np.mean([row["seconds"] for row in group]),
+        ))
+    table.sort(key=lambda row: row["mean"])
+    return table
+
+def format_table(table, parameters):
+    columns = list(parameters) + ["runs", "mean", "std", "best", "generations", "seconds"]
+    cells = [[("{:.4g}".format(row[c]) if isinstance(row[c], float) else str(row[c])) for c in columns] for row in table]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) if cells else len(c) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.rjust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.rjust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run the GA from a config file, or sweep its parameters.")
+    parser.add_argument("--config", help="JSON file with parameter values and an optional \"sweep\" section")
+    parser.add_argument("--set", type=parse_assignment, action="append", default=[], metavar="NAME=VALUE",
+                        help="override a parameter, e.g. --set pop_size=500")
+    parser.add_argument("--grid", type=parse_assignment, action="append", default=[], metavar="NAME=V1,V2",
+                        help="sweep every listed value, e.g. --grid crossover=ox,pmx")
+    parser.add_argument("--random", type=parse_assignment, action="append", default=[], metavar="NAME=MIN:MAX",
+                        help="sample a range (or a list of choices, V1,V2) at random")
+    parser.add_argument("--samples", type=int, help="random combinations to draw (default %d)" % SAMPLES)
+    parser.add_argument("--repeats", type=int, help="runs per combination (default %d)" % REPEATS)
+    parser.add_argument("--seed", type=int, help="root seed of the sweep")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the number of CPUs")
+    parser.add_argument("--output", help="write every run to this CSV file")
+    args = parser.parse_args(argv)
+
+    config, sweep = dict(DEFAULT_CONFIG), {}
+    if args.config:
+        with open(args.config) as file:
+            loaded = json.load(file)
+        sweep = loaded.pop("sweep", {})
+        unknown = set(loaded) - set(PARAMETERS)
+        if unknown:
+            parser.error("unknown parameters in " + args.config + ": " + ", ".join(sorted(unknown)))
+        config.update(loaded)
+    config.update((name, parse_value(value)) for name, value in args.set)
+
+    grid = dict(sweep.get("grid", {}))
+    grid.update((name, [parse_value(v) for v in value.split(",")]) for name, value in args.grid)
+    space = dict(sweep.get("random", {}))
+    for name, value in args.random:
+        if ":" in value:
+            low, high = value.split(":", 1)
+            space[name] = {"min": float(low), "max": float(high),
+                           "integer": isinstance(DEFAULT_CONFIG[name], int) and not isinstance(DEFAULT_CONFIG[name], bool)}
+        else:
+            space[name] = [parse_value(v) for v in value.split(",")]
+    if isinstance(space.get("pop_size"), dict):
+        # Crossover pairs the parents, so a sampled pop_size is rounded to an even integer.
+        space["pop_size"] = dict({"step": 2}, **space["pop_size"])
+        space["pop_size"]["integer"] = True
+
+    repeats = args.repeats or sweep.get("repeats", REPEATS)
+    seed = args.seed if args.seed is not None else sweep.get("seed", config["seed"])
+    samples = args.samples or sweep.get("samples", SAMPLES)
+
+    # Random combinations are drawn from their own stream, independent of the run seeds.
+    sampler_seed, runs_seed = np.random.SeedSequence(seed).spawn(2)
+    points = grid_points(grid)
+    if space:
+        rng = np.random.default_rng(sampler_seed)
+        points = [dict(point, **sample) for point in points for sample in random_points(space, samples, rng)]
+    # One bad combination would fail the whole sweep, so check them all before running any.
+    odd = sorted({size for size in (point.get("pop_size", config["pop_size"]) for point in points) if size % 2})
+    if odd:
+        parser.error("pop_size must be even, crossover pairs the selected parents: " + ", ".join(map(str, odd)))
+
+    if points == [{}] and repeats == 1:
+        result = solve(dict(config, seed=seed))
+        print("Stopped after " + str(result["generations"]) + " generations: " + str(result["stop_reason"]))
+        print("Best distance: " + str(result["best_fitness"]))
+        print("Best route: " + " -> ".join(result["best_tour"]))
+        return 0
+
+    rows = run_sweep(config, points, repeats, runs_seed, args.workers)
+    parameters = list(dict.fromkeys(name for point in points for name in point))
+    print(format_table(aggregate(rows, parameters), parameters))
+
+    if args.output:
+        fields = parameters + ["run", "entropy", "spawn_key", "best_fitness", "generations", "evaluations", "seconds", "stop_reason"]
+        with open(args.output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
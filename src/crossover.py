@@ -1,26 +1,28 @@
 import numpy as np
 
-def discrete_crossover(selected_population):
+def discrete_crossover(selected_population, rng=None):
     """
     Perform discrete crossover on a selected population to generate offspring.
     In discrete crossover, each gene of the offspring is randomly selected from 
     one of the corresponding genes of the parents.
     Args:
-        selected_population (list of lists): A list where each element is a list 
-                                             representing an individual in the population. 
+        selected_population (numpy.ndarray): A (pop_size, n) array where each row is an integer 
+                                             chromosome representing an individual in the population. 
                                              The population size should be even.
+        rng (numpy.random.Generator): The random number generator to use.
     Returns:
-        (list of lists): A list of offspring generated from the selected population. Each 
-                       offspring is a combination of genes from two parents.
+        (numpy.ndarray): A (pop_size, n) array of offspring generated from the selected population. 
+                         Each offspring is a combination of genes from two parents.
     """
 
     #TODO: Make the routes not have duplicate cities
 
 
+    rng = np.random.default_rng() if rng is None else rng
     offspring = []
     for i in range(0, len(selected_population), 2):
         p1, p2 = selected_population[i], selected_population[i+1]
-        rd_values = np.random.randint(0, 2, len(p1))
+        rd_values = rng.integers(0, 2, len(p1))
         c1, c2 = [], []
         # Ensure no duplicates in c1 and c2 and maintain the size of the parents
         c1_set, c2_set = set(c1), set(c2)
@@ -56,5 +58,175 @@ def discrete_crossover(selected_population):
                 c2.append(gene)
                 c2_set.add(gene)
         offspring.extend([c1, c2])
+    return np.array(offspring, dtype=selected_population.dtype)
+
+def _pair_parents(selected_population):
+    """
+    Splits a selected population into two parent arrays, stacked so that every pair of
+    parents produces two children: row k of the result pairs parent k with its mate.
+    """
+
+    p1, p2 = selected_population[0::2], selected_population[1::2]
+    return np.concatenate([p1, p2]), np.concatenate([p2, p1])
+
+def _interleave(children):
+    """
+    Reorders the children produced from `_pair_parents` so that siblings are adjacent.
+    """
+
+    half = len(children) // 2
+    offspring = np.empty_like(children)
+    offspring[0::2], offspring[1::2] = children[:half], children[half:]
     return offspring
-    
\ No newline at end of file
+
+def _segments(rng, n_pairs, n):
+    """
+    Draws one random segment [a, b] (inclusive) per pair of parents.
+    Returns the segment bounds and a (n_pairs, n) mask of the positions inside each segment.
+    """
+
+    cuts = np.sort(rng.integers(0, n, size=(n_pairs, 2)), axis=1)
+    a, b = cuts[:, 0], cuts[:, 1]
+    positions = np.arange(n)
+    return a, b, (positions >= a[:, None]) & (positions <= b[:, None])
+
+def order_crossover(selected_population, rng=None):
+    """
+    Perform order crossover (OX) on a selected population to generate offspring.
+    Each child copies a random segment from its first parent and fills the remaining 
+    positions, starting right after the segment, with the missing cities in the order 
+    they appear in the second parent. All the pairs are processed at once with array 
+    operations.
+    Args:
+        selected_population (numpy.ndarray): A (pop_size, n) array of integer chromosomes. 
+                                             The population size should be even.
+        rng (numpy.random.Generator): The random number generator to use.
+    Returns:
+        (numpy.ndarray): A (pop_size, n) array of offspring, two per pair of parents.
+    """
+
+    rng = np.random.default_rng() if rng is None else rng
+    p1, p2 = _pair_parents(selected_population)
+    n_pairs, n = p1.shape
+    rows = np.broadcast_to(np.arange(n_pairs)[:, None], (n_pairs, n))
+    a, b, in_segment = _segments(rng, n_pairs, n)
+
+    # Mark the cities already copied from the first parent.
+    taken = np.zeros((n_pairs, n), dtype=bool)
+    taken[rows, p1] = in_segment
+
+    # Walk the second parent starting after the segment and move the cities that are
+    # already taken to the end with a stable argsort; what remains is the fill order.
+    fill_positions = (b[:, None] + 1 + np.arange(n)) % n
+    donor = p2[rows, fill_positions]
+    order = np.argsort(taken[rows, donor], axis=1, kind="stable")
+    fill_values = donor[rows, order]
+
+    # The first n - len(segment) fill positions are exactly the positions outside it.
+    fill_mask = np.arange(n) < (n - (b - a + 1))[:, None]
+    children = p1.copy()
+    children[rows[fill_mask], fill_positions[fill_mask]] = fill_values[fill_mask]
+    return _interleave(children)
+
+def partially_mapped_crossover(selected_population, rng=None):
+    """
+    Perform partially-mapped crossover (PMX) on a selected population to generate offspring.
+    Each child copies a random segment from its first parent and the rest of the genes 
+    from the second parent. Genes that would be duplicated are replaced by following the 
+    mapping defined by the segment, for all the pairs at once.
+    Args:
+        selected_population (numpy.ndarray): A (pop_size, n) array of integer chromosomes. 
+                                             The population size should be even.
+        rng (numpy.random.Generator): The random number generator to use.
+    Returns:
+        (numpy.ndarray): A (pop_size, n) array of offspring, two per pair of parents.
+    """
+
+    rng = np.random.default_rng() if rng is None else rng
+    p1, p2 = _pair_parents(selected_population)
+    n_pairs, n = p1.shape
+    rows = np.broadcast_to(np.arange(n_pairs)[:, None], (n_pairs, n))
+    _, _, in_segment = _segments(rng, n_pairs, n)
+
+    taken = np.zeros((n_pairs, n), dtype=bool)
+    taken[rows, p1] = in_segment
+
+    # mapping[p1[k]] = p2[k] inside the segment, identity everywhere else.
+    mapping = np.tile(np.arange(n, dtype=p1.dtype), (n_pairs, 1))
+    mapping[rows[in_segment], p1[in_segment]] = p2[in_segment]
+
+    children = np.where(in_segment, p1, p2)
+    conflict = ~in_segment & taken[rows, children]
+    while conflict.any():
+        children[conflict] = mapping[rows[conflict], children[conflict]]
+        conflict = ~in_segment & taken[rows, children]
+    return _interleave(children)
+
+def edge_recombination_crossover(selected_population, rng=None):
+    """
+    Perform edge recombination crossover (ERX) on a selected population to generate offspring.
+    The child is built city by city: from the current city it moves to the unvisited 
+    neighbor (in either parent) that has the fewest unvisited neighbors left, so most of 
+    the child's edges are inherited from its parents. Each step is applied to all the 
+    pairs at once, so the work is n array operations per generation.
+    Args:
+        selected_population (numpy.ndarray): A (pop_size, n) array of integer chromosomes. 
+                                             The population size should be even.
+        rng (numpy.random.Generator): The random number generator to use.
+    Returns:
+        (numpy.ndarray): A (pop_size, n) array of offspring, two per pair of parents.
+    """
+
+    rng = np.random.default_rng() if rng is None else rng
+    p1, p2 = _pair_parents(selected_population)
+    n_pairs, n = p1.shape
+    pair_index = np.arange(n_pairs)
+    rows = np.broadcast_to(pair_index[:, None], (n_pairs, n))
+    edge_rows = np.broadcast_to(pair_index[:, None], (n_pairs, 4))
+
+    # Edge table: the previous and next city of every city in both parents, -1 if none.
+    neighbors = np.full((n_pairs, n, 4), -1, dtype=np.int64)
+    for k, parent in enumerate((p1, p2)):
+        neighbors[rows[:, 1:], parent[:, 1:], 2 * k] = parent[:, :-1]
+        neighbors[rows[:, :-1], parent[:, :-1], 2 * k + 1] = parent[:, 1:]
+    # Edges shared by both parents are only counted once.
+    for k in (2, 3):
+        duplicate = (neighbors[:, :, k:k + 1] == neighbors[:, :, :k]).any(axis=2)
+        neighbors[:, :, k][duplicate] = -1
+    degree = (neighbors >= 0).sum(axis=2)
+
+    visited = np.zeros((n_pairs, n), dtype=bool)
+    children = np.empty_like(p1)
+    current = p1[:, 0]
+    children[:, 0] = current
+
+    for step in range(1, n):
+        visited[pair_index, current] = True
+        candidates = neighbors[pair_index, current]
+        valid = candidates >= 0
+        safe_candidates = np.where(valid, candidates, 0)
+
+        # The current city disappears from the edge lists of its neighbors.
+        degree[edge_rows[valid], candidates[valid]] -= 1
+
+        valid &= ~visited[edge_rows, safe_candidates]
+        # Random fractions only break ties between equal degrees.
+        score = np.where(valid, degree[edge_rows, safe_candidates], n) + rng.random((n_pairs, 4))
+        current = candidates[pair_index, np.argmin(score, axis=1)]
+
+        # Dead ends continue from a random unvisited city.
+        stuck = ~valid.any(axis=1)
+        if stuck.any():
+            score = rng.random((stuck.sum(), n))
+            score[visited[stuck]] = -1
+            current[stuck] = np.argmax(score, axis=1)
+
+        children[:, step] = current
+    return _interleave(children)
+
+CROSSOVER_OPERATORS = {
+    "discrete": discrete_crossover,
+    "ox": order_crossover,
+    "pmx": partially_mapped_crossover,
+    "erx": edge_recombination_crossover,
+}
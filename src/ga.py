@@ -0,0 +1,114 @@
+import numpy as np
+from population import Population
+from selection import fitness_proportionate_selection, best_performer_selection, truncation_selection
+from crossover import CROSSOVER_OPERATORS
+from mutation import mutate
+from local_search import local_search, MAX_ITERATIONS
+from profiling import stage, count, GENERATION_STAGE
+from memo import tour_hashes, first_occurrences
+from termination import Incumbent, MaxGenerations, AnyOf
+
+def next_generation(population, distance_matrix, rng, pop_size,
+                    crossover="ox", mutation="swap", mutation_probability=0.2,
+                    neighbors=None, local_search_iterations=MAX_ITERATIONS,
+                    memo=None, reject_duplicates=False):
+    """
+    Evolves a population by one generation: selection, crossover, mutation and survivor selection.
+    Only the new offspring are evaluated, survivors keep their cached fitness and mutation
+    updates the offspring fitness with the delta of each move.
+    Args:
+        population (Population): The current population, with its cached fitness.
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        rng (numpy.random.Generator): The random number generator to use.
+        pop_size (int): The number of parents selected for breeding.
+        crossover (str): One of the keys of CROSSOVER_OPERATORS.
+        mutation (str): One of the keys of MUTATION_OPERATORS.
+        mutation_probability (float): The probability of mutation for each offspring.
+        neighbors (numpy.ndarray): The candidate lists from `nearest_neighbors`. When given, the
+                                   offspring are improved with 2-opt / Or-opt local search
+                                   before survivor selection (memetic mode).
+        local_search_iterations (int): The maximum number of local search moves per offspring.
+        memo (FitnessMemo): Optional cache of the fitness of known tours, so offspring equal to
+                            a recently seen tour are not evaluated again.
+        reject_duplicates (bool): Drop the offspring that are, up to direction, copies of a
+                                  parent or of an earlier offspring. Survivor selection still
+                                  keeps as many individuals as without rejection when it can.
+    Returns:
+        (Population): The next population. Its `evaluations` is the number of offspring that
+                      were evaluated in full, i.e. not found in the memo.
+    """
+
+    with stage("selection"):
+        selected_population = fitness_proportionate_selection(population, pop_size, rng)
+    with stage("crossover"):
+        children = CROSSOVER_OPERATORS[crossover](selected_population, rng)
+    offspring = Population.from_chromosomes(children, distance_matrix, memo)
+    with stage("mutation"):
+        mutated_offspring = mutate(offspring, mutation_probability, distance_matrix, mutation, rng)
+    if neighbors is not None:
+        with stage("local_search"):
+            mutated_offspring = local_search(mutated_offspring, distance_matrix, neighbors, local_search_iterations)
+    if reject_duplicates:
+        with stage("deduplication"):
+            unique = first_occurrences(tour_hashes(mutated_offspring.chromosomes), tour_hashes(population.chromosomes))
+            count("duplicates_rejected", int(len(unique) - unique.sum()))
+            survivors = (len(population) + len(mutated_offspring)) // 2
+            mutated_offspring = mutated_offspring.take(np.flatnonzero(unique))
+    with stage("survivor_selection"):
+        if reject_duplicates:
+            population = truncation_selection(population.extend(mutated_offspring), survivors)
+        else:
+            population = best_performer_selection(population.extend(mutated_offspring))
+    population.evaluations = offspring.evaluations
+    return population
+
+def evolve(population, distance_matrix, rng, generations, pop_size,
+           crossover="ox", mutation="swap", mutation_probability=0.2,
+           neighbors=None, local_search_iterations=MAX_ITERATIONS,
+           memo=None, reject_duplicates=False, termination=None, incumbent=None, checkpoint=None):
+    """
+    Runs the GA until a termination policy fires, yielding the population after each generation.
+    The arguments are those of `next_generation`, plus the following.
+    Args:
+        generations (int): The maximum number of generations, or None for no limit.
+        termination (Termination): An additional policy, e.g. `Stagnation(50) | TimeBudget(10)`.
+                                   The run stops as soon as it or the generation limit fires.
+        incumbent (Incumbent): Tracks the best tour and the run counters; pass one to read the
+                               best tour from another thread or to stop the run early, or the
+                               one restored from a checkpoint to resume a run.
+        checkpoint (callable): Called with (population, incumbent) once each generation has been
+                               consumed, e.g. a `checkpoint.Checkpointer`.
+    Yields:
+        tuple: The generation number, counted from the start of the run, and the population of
+               that generation.
+    """
+
+    policies = [MaxGenerations(generations)] if generations is not None else []
+    if termination is not None:
+        policies.append(termination)
+    if not policies:
+        raise ValueError("evolve needs a number of generations or a termination policy.")
+    termination = AnyOf(*policies)
+
+    incumbent = Incumbent() if incumbent is None else incumbent
+    if incumbent.best_tour is None:
+        # A new run: the initial population counts as evaluated. A resumed incumbent already has it.
+        incumbent.update(population, len(population))
+
+    while True:
+        if incumbent.stop_requested:
+            incumbent.stop_reason = "stop requested"
+            return
+        if termination.should_stop(incumbent):
+            incumbent.stop_reason = repr(termination.fired)
+            return
+
+        with stage(GENERATION_STAGE):
+            population = next_generation(population, distance_matrix, rng, pop_size, crossover, mutation,
+                                         mutation_probability, neighbors, local_search_iterations,
+                                         memo, reject_duplicates)
+        incumbent.generations += 1
+        incumbent.update(population, population.evaluations)
+        yield incumbent.generations - 1, population
+        if checkpoint is not None:
+            checkpoint(population, incumbent)
@@ -0,0 +1,203 @@
+import numpy as np
+from utils import generate_population
+from local_search import nearest_neighbors, NEIGHBORS
+
+SEEDED_FRACTION = 0.2
+RANDOMIZATION = 0.1
+HILBERT_ORDER = 16
+
+def nearest_neighbor_tours(distance_matrix, starts, rng, neighbors=None, randomization=RANDOMIZATION):
+    """
+    Builds one randomized nearest-neighbor tour per start city, all of them at once.
+    At every step each tour moves to its closest unvisited city, or, with probability
+    `randomization`, to a random unvisited city among the candidate neighbors. Only the
+    candidate lists are scanned; a full matrix row is read only when all the candidates
+    of a city have already been visited.
+    Args:
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        starts (numpy.ndarray): The start city of each tour.
+        rng (numpy.random.Generator): The random number generator to use.
+        neighbors (numpy.ndarray): The (n, k) candidate lists, computed if not given.
+        randomization (float): The probability of a random step.
+    Returns:
+        (numpy.ndarray): A (len(starts), n) int32 array of tours.
+    """
+
+    n = len(distance_matrix)
+    neighbors = nearest_neighbors(distance_matrix) if neighbors is None else neighbors
+    m, k = len(starts), neighbors.shape[1]
+    rows = np.arange(m)
+
+    tours = np.empty((m, n), dtype=np.int32)
+    visited = np.zeros((m, n), dtype=bool)
+    current = np.asarray(starts, dtype=np.int64)
+
+    for step in range(n):
+        tours[:, step] = current
+        visited[rows, current] = True
+        if step == n - 1:
+            break
+
+        candidates = neighbors[current]
+        free = ~visited[rows[:, None], candidates]
+        # Candidates are sorted by distance, so their rank is the greedy key; random rows
+        # use random keys instead.
+        keys = np.where((rng.random(m) < randomization)[:, None], rng.random((m, k)), np.arange(k) / k)
+        keys = np.where(free, keys, np.inf)
+        choice = np.argmin(keys, axis=1)
+        following = candidates[rows, choice].astype(np.int64)
+
+        stuck = ~free.any(axis=1)
+        if stuck.any():
+            row_distances = np.array(distance_matrix[current[stuck]], dtype=np.float64)
+            row_distances[visited[stuck]] = np.inf
+            following[stuck] = np.argmin(row_distances, axis=1)
+        current = following
+    return tours
+
+def greedy_edge_tour(distance_matrix, rng, neighbors=None, noise=0.0):
+    """
+    Builds a tour with the greedy edge heuristic restricted to the candidate lists.
+    Candidate edges are added shortest first whenever both cities still have a free end
+    and the edge does not close a cycle. The resulting path fragments are then chained,
+    each time jumping to the closest free end of the remaining fragments.
+    Args:
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        rng (numpy.random.Generator): The random number generator to use.
+        neighbors (numpy.ndarray): The (n, k) candidate lists, computed if not given.
+        noise (float): Relative noise added to the edge lengths, to build different tours.
+    Returns:
+        (numpy.ndarray): A (n,) int32 tour.
+    """
+
+    n = len(distance_matrix)
+    if n < 3:
+        return rng.permutation(n).astype(np.int32)
+    neighbors = nearest_neighbors(distance_matrix) if neighbors is None else neighbors
+
+    a = np.repeat(np.arange(n), neighbors.shape[1])
+    b = neighbors.ravel().astype(np.int64)
+    lengths = np.asarray(distance_matrix[a, b], dtype=np.float64)
+    if noise:
+        lengths *= 1.0 + noise * rng.random(len(lengths))
+    order = np.argsort(lengths, kind="stable")
+
+    degree = np.zeros(n, dtype=np.int64)
+    adjacency = np.full((n, 2), -1, dtype=np.int64)
+    parent = np.arange(n)
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    for edge in order:
+        u, v = a[edge], b[edge]
+        if degree[u] == 2 or degree[v] == 2:
+            continue
+        root_u, root_v = find(u), find(v)
+        if root_u == root_v:
+            continue
+        parent[root_u] = root_v
+        adjacency[u, degree[u]], adjacency[v, degree[v]] = v, u
+        degree[u] += 1
+        degree[v] += 1
+
+    # Every fragment is a path between two cities of degree < 2 (or a single city).
+    tour = np.empty(n, dtype=np.int32)
+    placed = np.zeros(n, dtype=bool)
+    ends = np.flatnonzero(degree < 2)
+    position = 0
+    city = ends[rng.integers(len(ends))]
+    while True:
+        previous = -1
+        while city != -1:
+            tour[position] = city
+            placed[city] = True
+            position += 1
+            following = adjacency[city, 0] if adjacency[city, 0] != previous else adjacency[city, 1]
+            previous, city = city, following
+        if position == n:
+            return tour
+        ends = ends[~placed[ends]]
+        distances = np.asarray(distance_matrix[tour[position - 1], ends], dtype=np.float64)
+        city = ends[np.argmin(distances)]
+
+def _hilbert_index(x, y, order=HILBERT_ORDER):
+    # Position of integer points on the Hilbert curve filling a 2^order x 2^order grid.
+    side = 1 << order
+    index = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        index += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s >>= 1
+    return index
+
+def space_filling_curve_tours(coordinates, count, rng):
+    """
+    Builds tours that visit the cities in the order of a Hilbert curve over their coordinates.
+    Every tour uses a different random rotation of the coordinates, so the tours differ.
+    Args:
+        coordinates (numpy.ndarray): The (n, 2) coordinates of the cities.
+        count (int): The number of tours to build.
+        rng (numpy.random.Generator): The random number generator to use.
+    Returns:
+        (numpy.ndarray): A (count, n) int32 array of tours.
+    """
+
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    tours = np.empty((count, len(coordinates)), dtype=np.int32)
+    for i, angle in enumerate(rng.uniform(0, 2 * np.pi, count)):
+        rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        points = coordinates @ rotation
+        points -= points.min(axis=0)
+        scale = points.max() if len(points) and points.max() > 0 else 1.0
+        grid = np.minimum((points / scale * (1 << HILBERT_ORDER)).astype(np.int64), (1 << HILBERT_ORDER) - 1)
+        tours[i] = np.argsort(_hilbert_index(grid[:, 0], grid[:, 1]), kind="stable")
+    return tours
+
+def generate_initial_population(distance_matrix, population_size, rng=None, seeded_fraction=SEEDED_FRACTION,
+                                coordinates=None, neighbors=None):
+    """
+    Generates an initial population where a fraction of the chromosomes comes from construction heuristics.
+    The seeded chromosomes are split between randomized nearest-neighbor tours, greedy edge
+    tours and, when coordinates are available, space-filling-curve tours. The rest of the
+    population is random, as in `generate_population`.
+    Args:
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        population_size (int): The number of chromosomes to generate.
+        rng (numpy.random.Generator): The random number generator to use.
+        seeded_fraction (float): The fraction of the population built by the heuristics.
+        coordinates (numpy.ndarray): The (n, 2) coordinates of the cities, if known.
+        neighbors (numpy.ndarray): The (n, k) candidate lists, computed if not given.
+    Returns:
+        (numpy.ndarray): A (population_size, n) int32 array of chromosomes.
+    """
+
+    rng = np.random.default_rng() if rng is None else rng
+    n = len(distance_matrix)
+    seeded = min(population_size, int(round(seeded_fraction * population_size)))
+    population = generate_population(population_size, n, rng)
+    if seeded == 0 or n < 2:
+        return population
+
+    neighbors = nearest_neighbors(distance_matrix, NEIGHBORS) if neighbors is None else neighbors
+    methods = 3 if coordinates is not None else 2
+    greedy = seeded // methods
+    curves = seeded // methods if coordinates is not None else 0
+    nearest = seeded - greedy - curves
+
+    tours = [nearest_neighbor_tours(distance_matrix, rng.integers(0, n, nearest), rng, neighbors)]
+    tours += [greedy_edge_tour(distance_matrix, rng, neighbors, noise=0.1 if i else 0.0)[None, :] for i in range(greedy)]
+    if curves:
+        tours.append(space_filling_curve_tours(coordinates, curves, rng))
+
+    population[:seeded] = np.concatenate(tours)
+    return population
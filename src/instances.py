@@ -0,0 +1,517 @@
+import csv
+import hashlib
+import math
+import os
+import numpy as np
+from problem import TSPProblem, smallest_distance_dtype
+
+BLOCK_SIZE = 1024
+SOURCE_KEY_SUFFIX = ".source"  # Sidecar of a matrix cache, holding the hash of the instance it was built from.
+CLOSURE_CACHE_DIR = os.path.join(".cache", "closures")
+CSV_FORMATS = ("coordinates", "edges")  # `name,x,y` and `city,city,distance` rows.
+
+TSPLIB_SECTIONS = ("NODE_COORD_SECTION", "EDGE_WEIGHT_SECTION", "DISPLAY_DATA_SECTION",
+                   "FIXED_EDGES_SECTION", "DEPOT_SECTION", "TOUR_SECTION", "EOF")
+
+def save_distance_matrix(path, distance_matrix):
+    """
+    Writes a distance matrix to a `.npy` file that later runs can memory-map.
+    """
+
+    np.save(path, np.ascontiguousarray(distance_matrix))
+
+def load_distance_matrix(path):
+    """
+    Opens a distance matrix written by `save_distance_matrix` as a read-only memory map.
+    Nothing is read from disk until the solver touches the matrix, and every process that
+    opens the same file shares the operating system's page cache instead of a private copy.
+    """
+
+    return np.load(path, mmap_mode="r")
+
+def _allocate(n, dtype, matrix_path):
+    # With a matrix path the output goes straight into a `.npy` memory map.
+    if matrix_path is None:
+        return np.empty((n, n), dtype=dtype)
+    return np.lib.format.open_memmap(matrix_path, mode="w+", dtype=dtype, shape=(n, n))
+
+def _finish(distance_matrix, matrix_path):
+    if matrix_path is None:
+        return distance_matrix
+    distance_matrix.flush()
+    del distance_matrix
+    return load_distance_matrix(matrix_path)
+
+def source_key(path, *parameters):
+    """
+    Returns a SHA-256 hex digest of an instance file and of the parameters its distance
+    matrix depends on (e.g. the metric), used to check that a matrix cache is up to date.
+    """
+
+    digest = hashlib.sha256(repr(parameters).encode())
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cached_distance_matrix(matrix_path, key, build):
+    """
+    Returns the distance matrix cached in `matrix_path` if it was built from the instance
+    whose `source_key` is `key`, and otherwise builds it and caches it there.
+    The key is kept in a sidecar file next to the matrix, written only once the matrix is
+    complete, so a cache left by another instance, or by an interrupted run, is rebuilt
+    instead of being silently reused.
+    Args:
+        matrix_path (str): The `.npy` cache, or None to build the matrix in memory.
+        key (str): The `source_key` of the instance.
+        build (callable): Builds the matrix, given the path to write it to (or None).
+    Returns:
+        (numpy.ndarray): The distance matrix, memory-mapped when `matrix_path` is given.
+    """
+
+    if matrix_path is None:
+        return build(None)
+
+    key_path = matrix_path + SOURCE_KEY_SUFFIX
+    if os.path.exists(matrix_path) and os.path.exists(key_path):
+        with open(key_path) as file:
+            if file.read().strip() == key:
+                return load_distance_matrix(matrix_path)
+
+    if os.path.exists(key_path):
+        os.remove(key_path)
+    distance_matrix = build(matrix_path)
+    with open(key_path, "w") as file:
+        file.write(key)
+    return distance_matrix
+
+def _euclidean(a, b):
+    return np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+
+def _nint_euclidean(a, b):
+    return np.floor(_euclidean(a, b) + 0.5)
+
+def _ceil_euclidean(a, b):
+    return np.ceil(_euclidean(a, b))
+
+def _geo_radians(coordinates):
+    # TSPLIB GEO coordinates are DDD.MM (degrees and minutes).
+    degrees = np.trunc(coordinates)
+    return 3.141592 * (degrees + 5.0 * (coordinates - degrees) / 3.0) / 180.0
+
+def _geo(a, b):
+    a, b = _geo_radians(a), _geo_radians(b)
+    q1 = np.cos(a[:, None, 1] - b[None, :, 1])
+    q2 = np.cos(a[:, None, 0] - b[None, :, 0])
+    q3 = np.cos(a[:, None, 0] + b[None, :, 0])
+    arc = np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0))
+    return np.trunc(6378.388 * arc + 1.0)
+
+# Metric name -> (block distance function, whether distances are integers).
+METRICS = {
+    "EUC_2D": (_nint_euclidean, True),
+    "CEIL_2D": (_ceil_euclidean, True),
+    "GEO": (_geo, True),
+    "EUCLIDEAN": (_euclidean, False),
+}
+
+def coordinates_distance_matrix(coordinates, metric="EUC_2D", matrix_path=None, block_size=BLOCK_SIZE):
+    """
+    Builds the distance matrix of a coordinate instance, one block of rows at a time.
+    The dtype is chosen before any distance is computed, from an upper bound of the largest
+    distance, so the full matrix is never materialized in a wider type.
+    Args:
+        coordinates (numpy.ndarray): The (n, 2) coordinates of the cities.
+        metric (str): One of the keys of METRICS.
+        matrix_path (str): If given, the matrix is written to this `.npy` file and returned as
+                           a read-only memory map.
+        block_size (int): The number of rows computed at once.
+    Returns:
+        (numpy.ndarray): The (n, n) distance matrix, in the smallest adequate dtype.
+    """
+
+    distance, integral = METRICS[metric]
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    n = len(coordinates)
+
+    if metric == "GEO":
+        bound = 6378.388 * math.pi + 1.0
+    elif n:
+        bound = math.ceil(np.linalg.norm(coordinates.max(axis=0) - coordinates.min(axis=0))) + 1.0
+    else:
+        bound = 0
+    dtype = smallest_distance_dtype(bound, integral)
+
+    distance_matrix = _allocate(n, dtype, matrix_path)
+    for start in range(0, n, block_size):
+        block = distance(coordinates[start:start + block_size], coordinates)
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = 0
+        distance_matrix[start:start + block_size] = block
+    return _finish(distance_matrix, matrix_path)
+
+def _explicit_distance_matrix(weights, n, weight_format, matrix_path):
+    weights = np.asarray(weights, dtype=np.float64)
+    integral = bool(np.all(weights == np.round(weights)))
+    dtype = smallest_distance_dtype(np.abs(weights).max() if weights.size else 0, integral)
+    distance_matrix = _allocate(n, dtype, matrix_path)
+
+    if weight_format == "FULL_MATRIX":
+        distance_matrix[...] = weights[:n * n].reshape(n, n)
+        return _finish(distance_matrix, matrix_path)
+
+    # Triangular formats list the rows of one triangle in row-major order.
+    triangles = {
+        "UPPER_ROW": lambda: np.triu_indices(n, 1),
+        "LOWER_ROW": lambda: np.tril_indices(n, -1),
+        "UPPER_DIAG_ROW": lambda: np.triu_indices(n, 0),
+        "LOWER_DIAG_ROW": lambda: np.tril_indices(n, 0),
+    }
+    if weight_format not in triangles:
+        raise ValueError("Unsupported EDGE_WEIGHT_FORMAT: " + weight_format)
+
+    rows, columns = triangles[weight_format]()
+    distance_matrix[...] = 0
+    distance_matrix[rows, columns] = weights[:len(rows)]
+    distance_matrix[columns, rows] = weights[:len(rows)]
+    return _finish(distance_matrix, matrix_path)
+
+def _parse_tsplib(path):
+    header, sections, current = {}, {}, None
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            keyword = line.split(":")[0].strip().upper()
+            if keyword in TSPLIB_SECTIONS:
+                current = keyword
+                sections[current] = []
+            elif current is None and ":" in line:
+                key, value = line.split(":", 1)
+                header[key.strip().upper()] = value.strip()
+            elif current is not None:
+                sections[current].extend(line.split())
+    return header, sections
+
+def load_tsplib(path, matrix_path=None):
+    """
+    Loads a symmetric TSPLIB instance (EUC_2D, CEIL_2D, GEO or EXPLICIT edge weights).
+    Args:
+        path (str): The path of the `.tsp` file.
+        matrix_path (str): Optional `.npy` cache of the distance matrix. If it was built from
+                           this file it is memory-mapped instead of computing the distances,
+                           otherwise the matrix is written there (see `cached_distance_matrix`).
+    Returns:
+        (TSPProblem): The problem, with city names "1".."n" and coordinates when the file has them.
+    """
+
+    header, sections = _parse_tsplib(path)
+    n = int(header["DIMENSION"])
+    weight_type = header.get("EDGE_WEIGHT_TYPE", "EXPLICIT").upper()
+
+    coordinates = None
+    for section in ("NODE_COORD_SECTION", "DISPLAY_DATA_SECTION"):
+        if sections.get(section):
+            coordinates = np.array(sections[section], dtype=np.float64).reshape(-1, 3)[:n, 1:]
+            break
+
+    if weight_type == "EXPLICIT":
+        weight_format = header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX").upper()
+        build = lambda output: _explicit_distance_matrix(sections["EDGE_WEIGHT_SECTION"], n, weight_format, output)
+    elif weight_type in METRICS:
+        build = lambda output: coordinates_distance_matrix(coordinates, weight_type, output)
+    else:
+        raise ValueError("Unsupported EDGE_WEIGHT_TYPE: " + weight_type)
+
+    key = source_key(path) if matrix_path is not None else None
+    distance_matrix = cached_distance_matrix(matrix_path, key, build)
+    return TSPProblem([str(i) for i in range(1, n + 1)], distance_matrix, coordinates)
+
+def _read_csv_rows(path):
+    # Returns the header row (None without one) and the data rows.
+    with open(path, newline="") as file:
+        rows = [row for row in csv.reader(file) if row and not row[0].startswith("#")]
+    # A header row is recognised by a non-numeric last column.
+    if rows:
+        try:
+            float(rows[0][-1])
+        except ValueError:
+            return rows[0], rows[1:]
+    return None, rows
+
+def _csv_format(header, rows):
+    """
+    Tells whether CSV rows hold coordinates (`name,x,y`) or edges (`city,city,distance`).
+    The header decides when it names the columns. Otherwise the rows are edges if their
+    second column is not numeric or if a city appears twice in the first column, which
+    happens in every edge list but a path; anything else is read as coordinates.
+    """
+
+    if header is not None:
+        columns = {name.strip().lower() for name in header}
+        if {"x", "y"} <= columns:
+            return "coordinates"
+        if columns & {"from", "to", "distance"}:
+            return "edges"
+    try:
+        float(rows[0][1])
+    except (IndexError, ValueError):
+        return "edges"
+    names = [row[0] for row in rows]
+    return "edges" if len(set(names)) < len(names) else "coordinates"
+
+def load_csv_coordinates(path, metric="EUCLIDEAN", matrix_path=None):
+    """
+    Loads a CSV file of `name,x,y` rows (an optional header row is skipped).
+    Args:
+        path (str): The path of the CSV file.
+        metric (str): One of the keys of METRICS.
+        matrix_path (str): Optional `.npy` cache of the distance matrix, as in `load_tsplib`.
+    Returns:
+        (TSPProblem): The problem.
+    """
+
+    return _csv_coordinates_problem(path, _read_csv_rows(path)[1], metric, matrix_path)
+
+def _csv_coordinates_problem(path, rows, metric, matrix_path):
+    city_names = [row[0] for row in rows]
+    coordinates = np.array([row[1:3] for row in rows], dtype=np.float64).reshape(-1, 2)
+
+    key = source_key(path, metric) if matrix_path is not None else None
+    distance_matrix = cached_distance_matrix(
+        matrix_path, key, lambda output: coordinates_distance_matrix(coordinates, metric, output))
+    return TSPProblem(city_names, distance_matrix, coordinates)
+
+def _csr_arrays(n, i, j, weights):
+    # Both directions of every edge, sorted by row then column, without self-loops and with
+    # the shortest weight of repeated edges: the (data, indices, indptr) arrays of a CSR matrix.
+    i, j = np.asarray(i, dtype=np.int64), np.asarray(j, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    keep = i != j
+    keys = np.concatenate([i[keep] * n + j[keep], j[keep] * n + i[keep]])
+    weights = np.concatenate([weights[keep], weights[keep]])
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    if len(keys) == 0:
+        return weights, keys, np.zeros(n + 1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    data = np.minimum.reduceat(weights[order], starts)
+    rows, columns = keys[starts] // n, keys[starts] % n
+    return data, columns, np.searchsorted(rows, np.arange(n + 1))
+
+def edges_to_csr(n, i, j, weights):
+    """
+    Builds the sparse adjacency matrix of an undirected graph from its edge list.
+    Only the edges are stored (CSR), so memory is O(E) instead of O(n^2). Self-loops are
+    dropped and, when an edge is listed more than once, its shortest weight is kept.
+    scipy is imported here, only when a sparse instance is loaded.
+    Args:
+        n (int): The number of cities.
+        i, j (numpy.ndarray): The end points of every edge.
+        weights (numpy.ndarray): The length of every edge.
+    Returns:
+        (scipy.sparse.csr_matrix): The symmetric (n, n) adjacency matrix; absent entries are
+                                   missing edges, stored zeros are zero-length edges.
+    """
+
+    from scipy.sparse import csr_matrix
+
+    data, columns, indptr = _csr_arrays(n, i, j, weights)
+    return csr_matrix((data, columns, indptr), shape=(n, n))
+
+def adjacency_list_edges(city_names, adjacency_list):
+    """
+    Returns the edge list of an adjacency list such as `utils.dist`.
+    Args:
+        city_names (list of str): The city names, in matrix order.
+        adjacency_list (dict): Maps each city name to a list of (distance, neighbor) tuples.
+    Returns:
+        tuple: The arrays i, j and weights of `edges_to_csr`.
+    """
+
+    city_to_index = {city: idx for idx, city in enumerate(city_names)}
+    edges = [(city_to_index[city], city_to_index[neighbor], distance)
+             for city, neighbors in adjacency_list.items() for distance, neighbor in neighbors]
+    if not edges:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    i, j, weights = zip(*edges)
+    return np.array(i, dtype=np.int64), np.array(j, dtype=np.int64), np.array(weights, dtype=np.float64)
+
+def adjacency_list_to_csr(city_names, adjacency_list):
+    """
+    Builds the sparse adjacency matrix of an adjacency list such as `utils.dist`.
+    """
+
+    return edges_to_csr(len(city_names), *adjacency_list_edges(city_names, adjacency_list))
+
+def metric_closure(graph, matrix_path=None, block_size=BLOCK_SIZE, method="D"):
+    """
+    Builds the dense matrix of shortest-path distances of a sparse graph.
+    Every pair of cities gets the length of the shortest path between them, so a tour on the
+    closure is a walk on the graph and no distance is missing. With Dijkstra ("D") the rows
+    are computed one block of sources at a time, so only the output matrix is O(n^2); with
+    Floyd-Warshall ("FW") the whole float64 matrix is computed at once, which is faster for
+    small dense graphs.
+    Args:
+        graph (scipy.sparse.csr_matrix): The symmetric adjacency matrix, e.g. from `edges_to_csr`.
+        matrix_path (str): If given, the matrix is written to this `.npy` file and returned as
+                           a read-only memory map.
+        block_size (int): The number of source cities per Dijkstra batch.
+        method (str): "D" (batched Dijkstra) or "FW" (Floyd-Warshall).
+    Returns:
+        (numpy.ndarray): The (n, n) distance matrix, in the smallest adequate dtype.
+    Raises:
+        ValueError: If the graph is not connected, since no tour could visit every city.
+    """
+
+    from scipy.sparse.csgraph import connected_components, dijkstra, floyd_warshall
+
+    n = graph.shape[0]
+    if n and connected_components(graph, directed=False)[0] > 1:
+        raise ValueError("The graph is not connected, so no tour visits every city.")
+
+    weights = graph.data
+    integral = bool(np.all(weights == np.round(weights)))
+    # A shortest path has at most n - 1 edges.
+    dtype = smallest_distance_dtype(weights.max() * max(n - 1, 1) if weights.size else 0, integral)
+    distance_matrix = _allocate(n, dtype, matrix_path)
+
+    if method == "FW":
+        distance_matrix[...] = floyd_warshall(graph, directed=False)
+    elif method == "D":
+        for start in range(0, n, block_size):
+            sources = np.arange(start, min(n, start + block_size))
+            distance_matrix[start:start + block_size] = dijkstra(graph, directed=False, indices=sources)
+    else:
+        raise ValueError("Unsupported metric closure method: " + method)
+    return _finish(distance_matrix, matrix_path)
+
+def hash_graph(graph):
+    """
+    Returns a SHA-256 hex digest of a sparse graph's structure and weights.
+    """
+
+    digest = hashlib.sha256(str(graph.shape).encode())
+    for array in (graph.indptr, graph.indices, graph.data):
+        digest.update(str(array.dtype).encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def cached_metric_closure(graph, cache_dir=CLOSURE_CACHE_DIR):
+    """
+    Returns the metric closure of a graph, computing it only once per graph.
+    The closure is stored in `cache_dir` under the hash of the graph and memory-mapped from
+    there by later runs. Use cache_dir=None to disable the cache.
+    """
+
+    if cache_dir is None:
+        return metric_closure(graph)
+    cache_path = os.path.join(cache_dir, hash_graph(graph) + ".npy")
+    if os.path.exists(cache_path):
+        return load_distance_matrix(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under a temporary name first, so a concurrent run never maps a partial matrix.
+    temporary = cache_path + "." + str(os.getpid()) + ".tmp.npy"
+    metric_closure(graph, temporary)
+    os.replace(temporary, cache_path)
+    return load_distance_matrix(cache_path)
+
+def load_csv_edges(path, matrix_path=None):
+    """
+    Loads a CSV file of `city,city,distance` rows describing an undirected graph.
+    A complete graph is used as is. Otherwise, e.g. for a road network, the edges are kept
+    in a sparse matrix and the distance between two cities is the length of the shortest
+    path between them (`metric_closure`), so no pair of cities is left without a distance.
+    Args:
+        path (str): The path of the CSV file.
+        matrix_path (str): Optional `.npy` cache of the distance matrix, as in `load_tsplib`.
+    Returns:
+        (TSPProblem): The problem.
+    Raises:
+        ValueError: If the graph is not connected.
+    """
+
+    return _csv_edges_problem(path, _read_csv_rows(path)[1], matrix_path)
+
+def _csv_edges_problem(path, rows, matrix_path):
+    city_names = list(dict.fromkeys(city for row in rows for city in row[:2]))
+    key = source_key(path) if matrix_path is not None else None
+    return TSPProblem(city_names, cached_distance_matrix(
+        matrix_path, key, lambda output: _edges_distance_matrix(city_names, rows, output)))
+
+def _edges_distance_matrix(city_names, rows, matrix_path):
+    city_to_index = {city: idx for idx, city in enumerate(city_names)}
+    i = np.array([city_to_index[row[0]] for row in rows], dtype=np.int64)
+    j = np.array([city_to_index[row[1]] for row in rows], dtype=np.int64)
+    weights = np.array([row[2] for row in rows], dtype=np.float64)
+    return edges_distance_matrix(len(city_names), i, j, weights, matrix_path)
+
+def edges_distance_matrix(n, i, j, weights, matrix_path=None):
+    """
+    Builds the distance matrix of an undirected graph from its edge list.
+    The edges are first gathered into CSR arrays, O(E), which also tells whether every pair
+    of cities has an edge. A complete graph is then copied into the dense matrix; for an
+    incomplete one the matrix is the metric closure of the sparse graph, so no dense matrix
+    with missing distances is ever built.
+    Args:
+        n (int): The number of cities.
+        i, j (numpy.ndarray): The end points of every edge.
+        weights (numpy.ndarray): The length of every edge.
+        matrix_path (str): If given, the matrix is written to this `.npy` file. Otherwise the
+                           closure of an incomplete graph comes from `cached_metric_closure`.
+    Returns:
+        (numpy.ndarray): The (n, n) distance matrix, in the smallest adequate dtype.
+    Raises:
+        ValueError: If the graph is not connected.
+    """
+
+    data, columns, indptr = _csr_arrays(n, i, j, weights)
+    if len(data) != n * (n - 1):
+        from scipy.sparse import csr_matrix
+
+        graph = csr_matrix((data, columns, indptr), shape=(n, n))
+        return cached_metric_closure(graph) if matrix_path is None else metric_closure(graph, matrix_path)
+
+    integral = bool(np.all(data == np.round(data)))
+    dtype = smallest_distance_dtype(data.max() if len(data) else 0, integral)
+    distance_matrix = _allocate(n, dtype, matrix_path)
+    distance_matrix[...] = 0
+    distance_matrix[np.repeat(np.arange(n), np.diff(indptr)), columns] = data
+    return _finish(distance_matrix, matrix_path)
+
+def load_instance(path, matrix_path=None, csv_format=None):
+    """
+    Loads an instance, choosing the loader from the file extension.
+    `.tsp` files are read as TSPLIB, `.npy` files as a bare distance matrix (memory-mapped),
+    and `.csv` files as coordinates (`name,x,y`) or as an edge list (`city,city,distance`),
+    as given by `csv_format` or detected by `_csv_format`.
+    Args:
+        path (str): The path of the instance file.
+        matrix_path (str): Optional `.npy` cache of the distance matrix.
+        csv_format (str): One of CSV_FORMATS for a `.csv` file; None detects it.
+    Returns:
+        (TSPProblem): The problem.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".tsp":
+        return load_tsplib(path, matrix_path)
+
+    if extension == ".npy":
+        distance_matrix = load_distance_matrix(path)
+        return TSPProblem([str(i) for i in range(len(distance_matrix))], distance_matrix)
+
+    if extension == ".csv":
+        # The rows are read once, both to detect the format and to build the problem.
+        header, rows = _read_csv_rows(path)
+        if csv_format is None:
+            csv_format = _csv_format(header, rows)
+        elif csv_format not in CSV_FORMATS:
+            raise ValueError("csv_format must be one of " + ", ".join(CSV_FORMATS) + ": " + str(csv_format))
+        if csv_format == "edges":
+            return _csv_edges_problem(path, rows, matrix_path)
+        return _csv_coordinates_problem(path, rows, "EUCLIDEAN", matrix_path)
+
+    raise ValueError("Unsupported instance file: " + path)
@@ -0,0 +1,142 @@
+import multiprocessing as mp
+import queue
+from multiprocessing import shared_memory
+import numpy as np
+from utils import dist, generate_population
+from profiling import profiler
+from problem import TSPProblem
+from population import Population
+from ga import next_generation
+
+ISLANDS = 4
+POP_SIZE = 200
+GENERATIONS = 100
+MUTATION_PROBABILITY = 0.2
+CROSSOVER = "ox"
+MUTATION = "swap"
+MIGRATION_INTERVAL = 10
+MIGRATION_SIZE = 5
+SEED = None
+
+def _evolve_island(island, shm_name, shape, dtype, seed_sequence, inbox, outbox, results, config):
+    """
+    Worker process: evolves one island and exchanges its best individuals along the ring.
+    The distance matrix is a view on the shared memory block, so it is never copied.
+    """
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    distance_matrix = None
+    try:
+        distance_matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        rng = np.random.default_rng(seed_sequence)
+        population = Population.from_chromosomes(
+            generate_population(config["pop_size"], shape[0], rng), distance_matrix)
+
+        for generation in range(1, config["generations"] + 1):
+            population = next_generation(population, distance_matrix, rng, config["pop_size"],
+                                         config["crossover"], config["mutation"],
+                                         config["mutation_probability"])
+
+            if config["migration_size"] and generation % config["migration_interval"] == 0:
+                order = np.argsort(population.fitness, kind="stable")
+                emigrants = population.take(order[:config["migration_size"]])
+                outbox.put((emigrants.chromosomes, emigrants.fitness))
+
+                # Migrants replace the worst individuals of the island.
+                chromosomes, fitness = inbox.get(timeout=config["migration_timeout"])
+                population = population.take(order[:len(population) - len(fitness)])
+                population = population.extend(Population(chromosomes, fitness))
+
+        best_index = np.argmin(population.fitness)
+        results.put((island, population.chromosomes[best_index], population.fitness[best_index]))
+    finally:
+        del distance_matrix
+        shm.close()
+
+def run_islands(distance_matrix, islands=ISLANDS, pop_size=POP_SIZE, generations=GENERATIONS,
+                crossover=CROSSOVER, mutation=MUTATION, mutation_probability=MUTATION_PROBABILITY,
+                migration_interval=MIGRATION_INTERVAL, migration_size=MIGRATION_SIZE, seed=SEED,
+                migration_timeout=600):
+    """
+    Runs the GA as an island model, one worker process per island.
+    The distance matrix is placed once in `multiprocessing.shared_memory` and every worker
+    reads it in place. Each island has its own RNG stream, spawned from `seed`, and every
+    `migration_interval` generations it sends its `migration_size` best individuals to the
+    next island of the ring, which replaces its worst individuals with them.
+    Args:
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        islands (int): The number of islands (worker processes).
+        pop_size (int): The population size of each island.
+        generations (int): The number of generations evolved by each island.
+        crossover (str): One of the keys of CROSSOVER_OPERATORS.
+        mutation (str): One of the keys of MUTATION_OPERATORS.
+        mutation_probability (float): The probability of mutation for each offspring.
+        migration_interval (int): The number of generations between migrations.
+        migration_size (int): The number of individuals each island sends per migration, 0 to disable.
+        seed (int): The seed of the run, None for a random one.
+        migration_timeout (float): How long, in seconds, an island waits for its migrants.
+    Returns:
+        tuple: A tuple containing:
+            - The best chromosome found by any island.
+            - The fitness value of the best chromosome.
+            - A list with the best fitness value of each island.
+    """
+
+    distance_matrix = np.ascontiguousarray(distance_matrix)
+    config = {
+        "pop_size": pop_size,
+        "generations": generations,
+        "crossover": crossover,
+        "mutation": mutation,
+        "mutation_probability": mutation_probability,
+        "migration_interval": max(1, migration_interval),
+        "migration_size": min(migration_size, pop_size // 2),
+        "migration_timeout": migration_timeout,
+    }
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, distance_matrix.nbytes))
+    try:
+        np.ndarray(distance_matrix.shape, dtype=distance_matrix.dtype, buffer=shm.buf)[...] = distance_matrix
+
+        # Island i receives from queue i and sends to queue i + 1, closing the ring.
+        queues = [mp.Queue() for _ in range(islands)]
+        results = mp.Queue()
+        workers = [
+            mp.Process(target=_evolve_island,
+                       args=(island, shm.name, distance_matrix.shape, distance_matrix.dtype,
+                             seed_sequence, queues[island], queues[(island + 1) % islands],
+                             results, config))
+            for island, seed_sequence in enumerate(np.random.SeedSequence(seed).spawn(islands))
+        ]
+        for worker in workers:
+            worker.start()
+
+        best = []
+        while len(best) < islands:
+            try:
+                best.append(results.get(timeout=1))
+            except queue.Empty:
+                if any(worker.exitcode not in (None, 0) for worker in workers):
+                    for worker in workers:
+                        worker.terminate()
+                    raise RuntimeError("An island worker exited without returning its result.")
+        for worker in workers:
+            worker.join()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    best.sort(key=lambda result: result[0])
+    best_island = min(range(islands), key=lambda island: best[island][2])
+    return best[best_island][1], best[best_island][2], [fitness for _, _, fitness in best]
+
+@profiler
+def main():
+    problem = TSPProblem.from_adjacency_list(dist)
+    best_chromosome, best_distance, island_distances = run_islands(problem.distance_matrix)
+
+    print("Best distance per island: " + ", ".join(str(d) for d in island_distances))
+    print("Best route (" + str(best_distance) + "): " + " -> ".join(problem.to_names(best_chromosome)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import numpy as np
+
+NEIGHBORS = 8
+MAX_ITERATIONS = 50
+MAX_MOVES = 32  # Moves a route applies per scan of the local search.
+SCAN_MOVES = 4  # Active cities a route scans per move it can apply.
+OR_OPT_SEGMENT_LENGTHS = (1, 2, 3)
+
+def nearest_neighbors(distance_matrix, k=NEIGHBORS, block_size=1024):
+    """
+    Computes the k nearest neighbors of every city, used as candidate lists by the local search.
+    Rows are processed in blocks with `np.argpartition`, so only a (block_size, n) slice of
+    the matrix is copied at a time.
+    Args:
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        k (int): The number of neighbors kept per city.
+        block_size (int): The number of rows processed at once.
+    Returns:
+        (numpy.ndarray): A (n, k) int32 array, row i holding the neighbors of city i sorted by distance.
+    """
+
+    n = len(distance_matrix)
+    k = max(0, min(k, n - 1))
+    neighbors = np.empty((n, k), dtype=np.int32)
+    if k == 0:
+        return neighbors
+
+    for start in range(0, n, block_size):
+        block = np.array(distance_matrix[start:start + block_size], dtype=np.float64)
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        candidates = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, candidates, axis=1), axis=1, kind="stable")
+        neighbors[start:start + len(block)] = np.take_along_axis(candidates, order, axis=1)
+    return neighbors
+
+def _two_opt_moves(routes, positions, distance_matrix, neighbors, neighbor_distance, r, i, predecessor):
+    """
+    Finds the improving candidate 2-opt moves of the cities at positions i of routes r.
+    A move (a, b) reverses routes[a + 1 .. b], replacing the edges (a, a + 1) and (b, b + 1)
+    with (a, b) and (a + 1, b + 1). The candidates of a city remove the edge to its successor
+    (or to its predecessor) and link the city to one of its nearest neighbors; only the
+    neighbors closer than the removed edge are tried, since the move can only gain if the
+    new edge is shorter than the removed one (the gain criterion of neighbor-list 2-opt).
+    Returns:
+        tuple: The scanned pair, gain, a and b of every candidate.
+    """
+
+    n = routes.shape[1]
+    city = routes[r, i]
+    j = i - 1 if predecessor else i  # The removed edge is (j, j + 1).
+    valid = (j >= 0) & (j < n - 1)
+    j = np.clip(j, 0, n - 2)
+    removed = distance_matrix[routes[r, j], routes[r, j + 1]]
+    pair, slot = np.nonzero(valid[:, None] & (neighbor_distance[city] < removed[:, None]))
+
+    rows, j = r[pair], j[pair]
+    p = positions[rows, neighbors[city[pair], slot]] - (1 if predecessor else 0)
+    a, b = np.minimum(j, p), np.maximum(j, p)
+    keep = (a >= 0) & (b > a + 1)
+    pair, rows, a, b = pair[keep], rows[keep], a[keep], b[keep]
+    has_next = b < n - 1
+    next_b = np.minimum(b + 1, n - 1)
+
+    ra, ra1, rb, rb1 = routes[rows, a], routes[rows, a + 1], routes[rows, b], routes[rows, next_b]
+    gain = (distance_matrix[ra, ra1].astype(np.float64) - distance_matrix[ra, rb]
+            + np.where(has_next, distance_matrix[rb, rb1].astype(np.float64) - distance_matrix[ra1, rb1], 0))
+    return pair, gain, a, b
+
+def _or_opt_moves(routes, positions, distance_matrix, neighbors, neighbor_distance, r, s, length, reverse):
+    """
+    Finds the improving candidate Or-opt moves of the segments starting at positions s of
+    routes r. A move (s, q) takes the segment routes[s .. s + length - 1] out of the route and
+    puts it back between routes[q] and routes[q + 1] (q = -1 and q = n - 1 insert at the
+    ends), reversed if `reverse` is set. The candidates place the first city of the segment
+    next to one of its nearest neighbors, closer than what removing the segment saves.
+    Returns:
+        tuple: The scanned pair, gain, s and q of every candidate.
+    """
+
+    n = routes.shape[1]
+    valid = s <= n - length
+    s = np.minimum(s, n - length)
+    e = s + length - 1
+    prev_s, next_e = np.maximum(s - 1, 0), np.minimum(e + 1, n - 1)
+    has_prev, has_next = s > 0, e < n - 1
+
+    r_s, r_e = routes[r, s], routes[r, e]
+    r_prev, r_next = routes[r, prev_s], routes[r, next_e]
+    removal_gain = (np.where(has_prev, distance_matrix[r_prev, r_s].astype(np.float64), 0)
+                    + np.where(has_next, distance_matrix[r_e, r_next].astype(np.float64), 0)
+                    - np.where(has_prev & has_next, distance_matrix[r_prev, r_next].astype(np.float64), 0))
+    pair, slot = np.nonzero(valid[:, None] & (neighbor_distance[r_s] < removal_gain[:, None]))
+
+    # Forward segments go right after the neighbor, reversed ones right before it, so the
+    # first city of the segment always ends up next to its neighbor.
+    rows, s, e = r[pair], s[pair], e[pair]
+    q = positions[rows, neighbors[r_s[pair], slot]] - (1 if reverse else 0)
+    keep = (q < s - 1) | (q > e)
+    pair, rows, s, e, q = pair[keep], rows[keep], s[keep], e[keep], q[keep]
+
+    has_q, has_q1 = q >= 0, q < n - 1
+    r_q, r_q1 = routes[rows, np.maximum(q, 0)], routes[rows, np.minimum(q + 1, n - 1)]
+    first, last = (r_e, r_s) if reverse else (r_s, r_e)
+    first, last = first[pair], last[pair]
+    insertion_cost = (np.where(has_q, distance_matrix[r_q, first].astype(np.float64), 0)
+                      + np.where(has_q1, distance_matrix[last, r_q1].astype(np.float64), 0)
+                      - np.where(has_q & has_q1, distance_matrix[r_q, r_q1].astype(np.float64), 0))
+    return pair, removal_gain[pair] - insertion_cost, s, q
+
+def _two_opt_source(columns, a, b):
+    reversed_segment = (columns > a) & (columns <= b)
+    return np.where(reversed_segment, a + 1 + b - columns, columns)
+
+def _or_opt_source(columns, s, q, length, reverse):
+    e = s + length - 1
+    right = q > e
+
+    # Moving right, the window [s, q] becomes the shifted cities followed by the segment;
+    # moving left, the window [q + 1, e] becomes the segment followed by the shifted cities.
+    segment_start = np.where(right, q - length + 1, q + 1)
+    offset = columns - segment_start
+    in_segment = (offset >= 0) & (offset < length)
+    segment_source = e - offset if reverse else s + offset
+    shifted = np.where(right, (columns >= s) & (columns < segment_start), (columns > q + length) & (columns <= e))
+    shifted_source = np.where(right, columns + length, columns - length)
+    return np.where(in_segment, segment_source, np.where(shifted, shifted_source, columns))
+
+def _best_per_pair(pair, gain):
+    """
+    Finds the best candidate of every scanned pair, among candidates sorted by pair.
+    Returns:
+        (numpy.ndarray): The indices of the best candidates.
+    """
+
+    if len(pair) == 0:
+        return np.zeros(0, dtype=np.intp)
+    starts = np.flatnonzero(np.r_[True, pair[1:] != pair[:-1]])
+    best = np.maximum.reduceat(gain, starts)
+    index = np.flatnonzero(gain == np.repeat(best, np.diff(np.r_[starts, len(pair)])))
+    return index[np.r_[True, pair[index[1:]] != pair[index[:-1]]]]
+
+def _select_moves(r, gain, lo, hi, max_moves):
+    """
+    Picks, in every route, a set of improving moves that can all be applied at once.
+    A move only changes the positions strictly inside its window (lo, hi), and only the edges
+    touching them, so moves whose windows share at most an end position are independent and
+    their gains add up. Moves are taken greedily by decreasing gain, at most `max_moves` per
+    route; every round takes the best remaining move of each route and drops the moves that
+    overlap it.
+    Returns:
+        (numpy.ndarray): The indices of the selected moves.
+    """
+
+    order = np.lexsort((-gain, r))
+    r, lo, hi = r[order], lo[order], hi[order]
+    starts = np.searchsorted(r, r)
+    alive = np.arange(len(r)) - starts < max_moves
+
+    selected = []
+    taken_lo, taken_hi = np.zeros(r[-1] + 1, dtype=lo.dtype), np.zeros(r[-1] + 1, dtype=hi.dtype)
+    while alive.any():
+        candidates = np.flatnonzero(alive)
+        # The moves are sorted by route and then by gain, so the first alive one of a route is its best.
+        best = candidates[np.unique(r[candidates], return_index=True)[1]]
+        selected.append(best)
+        alive[best] = False
+        taken = np.zeros(len(taken_lo), dtype=bool)
+        taken[r[best]] = True
+        taken_lo[r[best]], taken_hi[r[best]] = lo[best], hi[best]
+        alive &= ~(taken[r] & (lo < taken_hi[r]) & (hi > taken_lo[r]))
+    return order[np.concatenate(selected)]
+
+def local_search(offspring, distance_matrix, neighbors, max_iterations=MAX_ITERATIONS, max_moves=MAX_MOVES):
+    """
+    Improves a population of offspring with 2-opt and Or-opt moves (memetic step).
+    Every iteration scans up to SCAN_MOVES * `max_moves` active cities of every route, all
+    the routes at once, trying their candidate moves (see `_two_opt_moves` and
+    `_or_opt_moves`). Every route then applies all the improving moves it can apply together
+    (see `_select_moves`) with one gather. Cities start active; a city whose scan finds no
+    improving move goes to sleep (a don't-look bit) until a move changes an edge within a few
+    positions of it. The search stops when no city is active or after `max_iterations` scans. The cached fitness is updated in place with
+    the gains. 2-opt assumes a symmetric distance matrix.
+    Args:
+        offspring (Population): The evaluated population to improve.
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        neighbors (numpy.ndarray): The (n, k) candidate lists from `nearest_neighbors`.
+        max_iterations (int): The maximum number of scans.
+        max_moves (int): The maximum number of moves a route applies per scan.
+    Returns:
+        (Population): The improved population.
+    """
+
+    m, n = offspring.chromosomes.shape
+    if n < 3 or neighbors.shape[1] == 0:
+        return offspring
+
+    routes = offspring.chromosomes
+    rows, columns = np.arange(m)[:, None], np.arange(n)
+    positions = np.empty_like(routes)
+    np.put_along_axis(positions, routes, columns[None, :], axis=1)
+    neighbor_distance = np.asarray(distance_matrix[columns[:, None], neighbors], dtype=np.float64)
+    # Move kinds: 0 and 1 are 2-opt from the successor and the predecessor edge, the others
+    # are the Or-opt (segment length, reversed) variants.
+    or_opt_moves = [(length, reverse) for length in OR_OPT_SEGMENT_LENGTHS if length <= n - 2
+                    for reverse in (False, True)]
+    lengths = np.array([0, 0] + [length for length, _ in or_opt_moves])
+    awake = np.ones((m, n), dtype=bool)  # By city.
+
+    scan_size = SCAN_MOVES * max_moves
+    for iteration in range(max_iterations):
+        # A route applies at most `max_moves` moves per scan, so it only scans the next
+        # `scan_size` active cities, from a start position that moves along the route.
+        active = awake[rows, routes]
+        if not active.any():
+            break
+        start = iteration * scan_size % n
+        active = np.roll(active, -start, axis=1)
+        active &= np.cumsum(active, axis=1) <= scan_size
+        r, i = np.nonzero(np.roll(active, start, axis=1))
+
+        found = [_two_opt_moves(routes, positions, distance_matrix, neighbors, neighbor_distance, r, i, predecessor)
+                 for predecessor in (False, True)]
+        found += [_or_opt_moves(routes, positions, distance_matrix, neighbors, neighbor_distance, r, i, length, reverse)
+                  for length, reverse in or_opt_moves]
+
+        # Keep the best improving move of every scanned city.
+        moves = []
+        for t, (pair, gain, x, y) in enumerate(found):
+            best = _best_per_pair(pair, gain)
+            best = best[gain[best] > 1e-9]
+            moves.append((np.full(len(best), t), pair[best], gain[best], x[best], y[best]))
+        kind, pair, gain, x, y = (np.concatenate(arrays) for arrays in zip(*moves))
+        order = np.argsort(pair, kind="stable")
+        best = order[_best_per_pair(pair[order], gain[order])]
+        kind, pair, gain, x, y = kind[best], pair[best], gain[best], x[best], y[best]
+
+        asleep = np.ones(len(r), dtype=bool)
+        asleep[pair] = False
+        awake[r[asleep], routes[r[asleep], i[asleep]]] = False
+        if len(pair) == 0:
+            continue
+        move_route = r[pair]
+
+        # The window of a move: the positions strictly inside it change, its ends do not.
+        two_opt = kind < 2
+        lo = np.where(two_opt, x, np.minimum(x - 1, y))
+        hi = np.where(two_opt, y + 1, np.maximum(x + lengths[kind], y + 1))
+
+        chosen = _select_moves(move_route, gain, lo, hi, max_moves)
+        move_route, gain, kind, x, y = move_route[chosen], gain[chosen], kind[chosen], x[chosen], y[chosen]
+        lo, hi, two_opt = lo[chosen], hi[chosen], two_opt[chosen]
+
+        # The source map of every route: each position inside a window takes its city from the
+        # position its move sends there. The windows do not overlap, so this is at most one
+        # entry per position.
+        source = np.broadcast_to(columns, (m, n)).copy()
+        sizes = hi - lo - 1
+        move = np.repeat(np.arange(len(kind)), sizes)
+        column = lo[move] + 1 + np.arange(len(move)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        for t in np.unique(kind):
+            of_kind = kind[move] == t
+            entry_move, entry_column = move[of_kind], column[of_kind]
+            if t < 2:
+                entry_source = _two_opt_source(entry_column, x[entry_move], y[entry_move])
+            else:
+                length, reverse = or_opt_moves[t - 2]
+                entry_source = _or_opt_source(entry_column, x[entry_move], y[entry_move], length, reverse)
+            source[move_route[entry_move], entry_column] = entry_source
+
+        changed = np.unique(move_route)
+        routes[changed] = np.take_along_axis(routes[changed], source[changed], axis=1)
+        positions[changed[:, None], routes[changed]] = columns
+        offspring.fitness[changed] -= np.bincount(move_route, gain, minlength=m)[changed].astype(offspring.fitness.dtype)
+
+        # Wake the cities next to a changed edge, and those starting a segment that reaches it:
+        # the ends of each window and, for Or-opt, the edge between the segment and the
+        # cities it was moved over.
+        junction = np.where(two_opt, lo, np.where(y > x, y - lengths[kind], y + lengths[kind]))
+        reach = max(OR_OPT_SEGMENT_LENGTHS)
+        wake = np.zeros((m, n + 1), dtype=np.int64)
+        for edge in (lo, hi - 1, junction):
+            np.add.at(wake, (move_route, np.clip(edge - reach, 0, n)), 1)
+            np.add.at(wake, (move_route, np.clip(edge + 2, 0, n)), -1)
+        awake[rows, routes] |= np.cumsum(wake[:, :n], axis=1) > 0
+    return offspring
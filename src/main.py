@@ -1,73 +1,208 @@
-from utils import *
-from selection import *
-from crossover import discrete_crossover
-from mutation import mutation_by_change
-from GUI import *
+import os
+import sys
+import numpy as np
+from utils import dist, load_mds_coordinates
+from profiling import profiler, stage
+from problem import TSPProblem
+from instances import load_instance
+from initialization import generate_initial_population
+from population import Population
+from ga import evolve
+from recorder import RunRecorder, generation_records, stream, open_run
+from local_search import nearest_neighbors
+from memo import FitnessMemo
+from termination import Incumbent, termination_policy
+from checkpoint import Checkpointer, load_checkpoint
+import profiling
 
 POP_SIZE = 200
-GENERATIONS = 100
+GENERATIONS = 100  # The maximum number of generations; the limits below can stop the run earlier.
+STAGNATION = None  # Stop after this many generations without a better tour.
+TIME_BUDGET = None  # Stop after this many seconds.
+EVALUATION_BUDGET = None  # Stop after this many chromosome evaluations.
+TARGET_LENGTH = None  # Stop as soon as a tour at most this long is found.
 MUTATION_PROBABILITY = 0.2
+CROSSOVER = "ox"  # One of the keys of CROSSOVER_OPERATORS: discrete, ox, pmx, erx.
+MUTATION = "swap"  # One of the keys of MUTATION_OPERATORS: swap, inversion, insertion, scramble.
+SEED = None
+INSTANCE = None  # Path of a .tsp, .csv or .npy instance; None uses the built-in `dist` cities.
+INSTANCE_MATRIX = None  # Optional .npy cache of the instance's distance matrix, memory-mapped on later runs.
+INSTANCE_FORMAT = None  # "coordinates" or "edges" for a .csv instance; None detects it from the file.
+LOCAL_SEARCH = False  # Memetic mode: improve the offspring with 2-opt / Or-opt.
+LOCAL_SEARCH_NEIGHBORS = 8
+FITNESS_MEMO_SIZE = 0  # Tours whose fitness is remembered, by canonical hash; 0 disables the memo. It only
+                       # pays off on large instances (about 1000 cities and more) with many repeated tours.
+REJECT_DUPLICATES = False  # Drop offspring that copy a parent or another offspring, to keep diversity.
+SEEDED_FRACTION = 0.2  # Fraction of the initial population built by construction heuristics.
+CHECKPOINT = "run.ckpt.npz"  # Latest checkpoint of the run, read by --resume.
+CHECKPOINT_GENERATIONS = 10  # Save a checkpoint every this many generations; None disables it.
+CHECKPOINT_SECONDS = None  # Save a checkpoint every this many seconds; None disables it.
+RUN_FILE = "run.garun"  # Per-generation records of the last run, memory-mapped by the plots.
+HEADLESS = False  # Never call fig.show(); for batch jobs on machines without a display.
+PLOTS = True  # Write the HTML plots (imports plotly, and sklearn for instances without coordinates).
+PROFILE = None  # Path of a JSON file with the time spent in each stage and the evaluation counters.
+TRACE = None  # Path of the same timings as a Chrome trace (chrome://tracing, Perfetto).
+
+def write_plots(problem, run, show):
+    """
+    Writes the HTML plots of a recorded run, and opens them if `show` is set.
+    plotly (and sklearn, for instances without coordinates) are imported here, only when
+    output is requested, so headless runs never load them.
+    """
+
+    from GUI import plot_dispersion, plot_median, plot_routes_animation
+
+    if problem.coordinates is not None:
+        initial_city_coordinates = {city: tuple(coord) for city, coord in zip(problem.city_names, problem.coordinates)}
+    else:
+        initial_city_coordinates = load_mds_coordinates(problem.distance_matrix, problem.city_names)
+    generations = run["generation"].tolist()
+
+    with stage("plotting"):
+        plot_dispersion(run, show=show)
+        plot_median(run, show=show)
+
+        # City names are only needed here, at the edge, to draw the routes.
+        plot_routes_animation(initial_city_coordinates,
+                              [("Best", [problem.to_names(route) for route in run["best_tour"]], run["min"], 'green'),
+                               ("Median", [problem.to_names(route) for route in run["median_tour"]], run["median"], 'blue'),
+                               ("Worst", [problem.to_names(route) for route in run["worst_tour"]], run["max"], 'orange')],
+                              generations,
+                              "routes.html",
+                              show
+                              )
+
+# The GA parameters of a run; their defaults are the constants of the same name, in upper case.
+PARAMETERS = ("pop_size", "generations", "stagnation", "time_budget", "evaluation_budget", "target_length",
+              "mutation_probability", "crossover", "mutation", "seed", "instance", "instance_matrix",
+              "instance_format", "local_search", "local_search_neighbors", "fitness_memo_size",
+              "reject_duplicates", "seeded_fraction")
+
+def default_config():
+    """
+    Returns the parameters of a run as set by the constants of this module.
+    """
+
+    return {name: globals()[name.upper()] for name in PARAMETERS}
+
+def load_problem(instance=None, instance_matrix=None, instance_format=None):
+    """
+    Loads an instance file, or the built-in `dist` cities when `instance` is None.
+    """
+
+    if instance is None:
+        return TSPProblem.from_adjacency_list(dist)
+    return load_instance(instance, instance_matrix, instance_format)
+
+def run(config=None, seed=None, problem=None, recorder=None, checkpoint=None,
+        checkpoint_generations=None, checkpoint_seconds=None, resume=False):
+    """
+    Runs the GA once: builds the initial population and evolves it until a limit is reached.
+    Both `main` and the sweeps of `cli` run the GA through this function.
+    Args:
+        config (dict): Values for the keys of PARAMETERS; missing keys use `default_config()`.
+        seed: Anything accepted by numpy.random.default_rng, e.g. a SeedSequence. Defaults to
+              config["seed"].
+        problem (TSPProblem): The instance, loaded from config["instance"] when None.
+        recorder (callable): Receives the record of every generation, e.g. a RunRecorder.
+        checkpoint (str): The path of the checkpoint, saved every `checkpoint_generations`
+                          generations and/or every `checkpoint_seconds` seconds.
+        resume (bool): Continue the run saved in `checkpoint` instead of starting a new one; the
+                       recorder drops the records written after the checkpoint.
+    Returns:
+        tuple: The problem and the Incumbent of the run, with its best tour and counters.
+    """
+
+    config = dict(default_config(), **(config or {}))
+    if config["pop_size"] % 2:
+        raise ValueError("pop_size must be even, crossover pairs the selected parents: " + str(config["pop_size"]))
+    rng = np.random.default_rng(config["seed"] if seed is None else seed)
+    if problem is None:
+        problem = load_problem(config["instance"], config["instance_matrix"], config["instance_format"])
+    distance_matrix = problem.distance_matrix
+
+    with stage("initialization"):
+        neighbors = None
+        if config["local_search"]:
+            neighbors = nearest_neighbors(distance_matrix, config["local_search_neighbors"])
+        if resume:
+            # The population, RNG state and counters continue exactly where the checkpoint left them.
+            population, rng, incumbent, run_records = load_checkpoint(checkpoint)
+            if recorder is not None:
+                recorder.truncate(run_records)
+        else:
+            population = Population.from_chromosomes(
+                generate_initial_population(distance_matrix, config["pop_size"], rng, config["seeded_fraction"],
+                                            problem.coordinates, neighbors),
+                distance_matrix)
+            incumbent = Incumbent()
+
+    memo = FitnessMemo(config["fitness_memo_size"]) if config["fitness_memo_size"] else None
+    checkpointer = None
+    if checkpoint is not None and (checkpoint_generations or checkpoint_seconds):
+        checkpointer = Checkpointer(checkpoint, rng, recorder, checkpoint_generations, checkpoint_seconds)
+    generations = evolve(population, distance_matrix, rng, config["generations"], config["pop_size"],
+                         config["crossover"], config["mutation"], config["mutation_probability"], neighbors,
+                         memo=memo, reject_duplicates=config["reject_duplicates"],
+                         termination=termination_policy(None, config["stagnation"], config["time_budget"],
+                                                        config["evaluation_budget"], config["target_length"]),
+                         incumbent=incumbent, checkpoint=checkpointer)
+    if recorder is None:
+        for _ in generations:
+            pass
+    else:
+        stream(generation_records(generations, incumbent.start), recorder)
+    return problem, incumbent
 
 @profiler
-def main():
-    population = generate_population(POP_SIZE)
-    distance_matrix = create_distance_matrix(list(dist.keys()), dist)
-    initial_city_coordinates = generate_mds_coordinates(distance_matrix, list(dist.keys()))
-    best_routes, best_distances, worst_routes, worst_distances = [], [], [], []
-    med_routes, med_distances = [], []
-    values = []
-
-    for _ in range(GENERATIONS):
-        selected_population = fitness_proportionate_selection(population, POP_SIZE)
-        offspring = discrete_crossover(selected_population)
-        mutated_offspring = mutation_by_change(offspring, MUTATION_PROBABILITY)
-        population.extend(mutated_offspring)
-        population = best_performer_selection(population)
-
-        #TODO:  Need to extract the best chromosome from the population
-        #       and plot it
-
-        med_chromosome, med_distance, fitness = select_med_chromosome(population)
-        values.append(fitness)
-
-        best_chromosome, best_distance, worst_chromosome, worst_distance = select_best_chromosome(population)
-
-
-        worst_routes.append(generate_mds_coordinates(distance_matrix, worst_chromosome))
-        worst_distances.append(worst_distance)
-
-        med_routes.append(generate_mds_coordinates(distance_matrix, med_chromosome))
-        med_distances.append(med_distance)
-
-        best_routes.append(generate_mds_coordinates(distance_matrix, best_chromosome))
-        best_distances.append(best_distance)
-
-    #TODO:  Plotting the best and worst chromosome in the population
-    #       after each generation, along with their fitness values.
-    
-    plot_dispersion(values)
-    plot_median(values)
-
-    plot_worst_routes_animation(initial_city_coordinates,
-                                worst_routes,
-                                [_ for _ in range(GENERATIONS)],
-                                worst_distances
-                                )
-    
-    plot_median_routes_animation(initial_city_coordinates, 
-                                 med_routes, 
-                                 [_ for _ in range(GENERATIONS)],
-                                 med_distances
-                                 )
-
-    plot_best_routes_animation(initial_city_coordinates,
-                               best_routes,
-                               [_ for _ in range(GENERATIONS)],
-                               best_distances
-                               )
+def main(headless=HEADLESS, plots=PLOTS, resume=False):
+    problem = load_problem(INSTANCE, INSTANCE_MATRIX, INSTANCE_FORMAT)
+    # A fresh run file per run; the recorder appends to it in chunks as generations finish.
+    # A resumed run keeps the records up to its checkpoint and drops the ones written after it.
+    # A new run also drops the checkpoint of the previous one, so --resume cannot pick it up.
+    if not resume:
+        for path in (RUN_FILE, CHECKPOINT, CHECKPOINT + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    with RunRecorder(RUN_FILE, problem.n_cities) as recorder:
+        _, incumbent = run(problem=problem, recorder=recorder, checkpoint=CHECKPOINT,
+                           checkpoint_generations=CHECKPOINT_GENERATIONS,
+                           checkpoint_seconds=CHECKPOINT_SECONDS, resume=resume)
+
+    print("Stopped after " + str(incumbent.generations) + " generations: " + str(incumbent.stop_reason))
+
+    best_tour, best_fitness = incumbent.best()
+    print("Best distance: " + str(best_fitness))
+    print("Best route: " + " -> ".join(problem.to_names(best_tour)))
+
+    if plots:
+        records = open_run(RUN_FILE)
+        # A run can stop before its first generation, e.g. when the initial population already
+        # meets TARGET_LENGTH or the budget is spent; there is nothing to plot then.
+        if len(records):
+            write_plots(problem, records, show=not headless)
+        else:
+            print("No generation was recorded, so no plot was written.")
+
+def _option(name, default=None):
+    # The value following `name` on the command line, e.g. --profile profile.json.
+    if name in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
 
 if __name__ == "__main__":
-    main()
+    # --headless never opens a figure; add --plots to still write the HTML files.
+    headless = "--headless" in sys.argv
+    # --profile / --trace write the stage timings as JSON or as a Chrome trace.
+    profile_path, trace_path = _option("--profile", PROFILE), _option("--trace", TRACE)
+    if profile_path or trace_path:
+        profiling.enable(trace=trace_path is not None)
+    # --resume continues the run saved in CHECKPOINT instead of starting a new one.
+    main(headless=headless, plots="--plots" in sys.argv or not headless, resume="--resume" in sys.argv)
+    if profile_path:
+        profiling.PROFILER.to_json(profile_path)
+    if trace_path:
+        profiling.PROFILER.to_chrome_trace(trace_path)
 
 #TODO:  dispersia, selectie turneu?, medie populatie,
 #       incrucisarea, distanta medie la fiecare gen grafic, grafic dispersie
\ No newline at end of file
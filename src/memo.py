@@ -0,0 +1,149 @@
+import numpy as np
+from profiling import count
+
+MEMO_SIZE = 100000
+HASH_SEED = 0x5EED
+
+_multipliers = np.zeros(0, dtype=np.uint64)
+
+def canonical_tours(chromosomes):
+    """
+    Returns the chromosomes in canonical form, so that equivalent tours compare equal.
+    Fitness is the length of the open path from the first to the last city, so a rotation is
+    a different tour with a different length and is kept as is. Only the direction is
+    normalized: a path is reversed when its first city has a larger index than its last one.
+    With a symmetric distance matrix both directions have the same length.
+    Args:
+        chromosomes (numpy.ndarray): A (pop_size, n) array of city indices.
+    Returns:
+        (numpy.ndarray): A (pop_size, n) array, a copy only where rows were reversed.
+    """
+
+    chromosomes = np.asarray(chromosomes)
+    reverse = chromosomes[:, 0] > chromosomes[:, -1]
+    if not reverse.any():
+        return chromosomes
+    return np.where(reverse[:, None], chromosomes[:, ::-1], chromosomes)
+
+def _position_multipliers(n):
+    # Random odd 64-bit multipliers, one per position, drawn once from a fixed seed so that
+    # hashes are the same in every process.
+    global _multipliers
+    if len(_multipliers) < n:
+        rng = np.random.default_rng(HASH_SEED)
+        _multipliers = rng.integers(0, 1 << 63, max(n, 2 * len(_multipliers)), dtype=np.uint64) * 2 + 1
+    return _multipliers[:n]
+
+def tour_hashes(chromosomes):
+    """
+    Hashes every chromosome in canonical form to a 64-bit integer, all rows at once.
+    The hash is a sum of (city + 1) times a random odd multiplier per position, computed with
+    wrapping uint64 arithmetic and finished with a xorshift-multiply mix. Distinct tours
+    collide with a probability of about 2^-64.
+    Args:
+        chromosomes (numpy.ndarray): A (pop_size, n) array of city indices.
+    Returns:
+        (numpy.ndarray): A (pop_size,) uint64 array.
+    """
+
+    # Hashing the reversed path is the same as hashing the path with the multipliers
+    # reversed, so the canonical tours are never built; sum((city + 1) * m) is computed as
+    # a product with the multipliers plus their sum, without a temporary per gene.
+    tours = np.asarray(chromosomes).astype(np.uint64)
+    multipliers = _position_multipliers(tours.shape[1])
+    reverse = tours[:, 0] > tours[:, -1]
+    h = np.empty(len(tours), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        h[~reverse] = tours[~reverse] @ multipliers
+        h[reverse] = tours[reverse] @ multipliers[::-1]
+        h += multipliers.sum(dtype=np.uint64)
+        h ^= h >> np.uint64(33)
+        h *= np.uint64(0xFF51AFD7ED558CCD)
+        h ^= h >> np.uint64(33)
+    return h
+
+def first_occurrences(hashes, exclude=None):
+    """
+    Returns a boolean mask of the hashes seen for the first time, in order.
+    Args:
+        hashes (numpy.ndarray): The hashes to filter.
+        exclude (numpy.ndarray): Hashes that count as already seen, e.g. those of the parents.
+    """
+
+    _, first = np.unique(hashes, return_index=True)
+    mask = np.zeros(len(hashes), dtype=bool)
+    mask[first] = True
+    if exclude is not None and len(exclude):
+        mask &= ~np.isin(hashes, exclude)
+    return mask
+
+class FitnessMemo:
+    """
+    A bounded least-recently-used cache from tour hash to fitness.
+    The hashes are kept in a sorted array, so a whole batch is looked up with one
+    `np.searchsorted` and stored with one `np.insert`, without a Python loop per tour.
+    Every lookup or store stamps its tours with a batch counter; when the memo is full, the
+    tours with the oldest stamps are evicted. Hits are counted by the profiler as
+    "fitness_cache_hits".
+    The memo only pays off when evaluating a tour costs more than hashing it and searching
+    the sorted hashes, i.e. for large instances whose distance matrix does not fit in the
+    CPU caches, and when the population produces many repeated tours.
+    Attributes:
+        max_size (int): The maximum number of tours kept.
+    """
+
+    def __init__(self, max_size=MEMO_SIZE):
+        self.max_size = max_size
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.values = np.zeros(0, dtype=np.float64)
+        self.stamps = np.zeros(0, dtype=np.int64)
+        self.clock = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _find(self, hashes):
+        # Positions of the hashes in the sorted keys, and whether they are there.
+        positions = np.searchsorted(self.keys, hashes)
+        found = np.zeros(len(hashes), dtype=bool)
+        inside = positions < len(self.keys)
+        found[inside] = self.keys[positions[inside]] == hashes[inside]
+        return positions, found
+
+    def lookup(self, hashes):
+        """
+        Looks up a batch of hashes.
+        Returns:
+            tuple: The fitness of each hash (NaN when missing) and a boolean mask of the hits.
+        """
+
+        positions, found = self._find(hashes)
+        fitness = np.full(len(hashes), np.nan)
+        fitness[found] = self.values[positions[found]]
+        self.clock += 1
+        self.stamps[positions[found]] = self.clock
+        count("fitness_cache_hits", int(found.sum()))
+        return fitness, found
+
+    def store(self, hashes, fitness):
+        if len(hashes) == 0:
+            return
+        hashes, first = np.unique(hashes, return_index=True)
+        fitness = np.asarray(fitness, dtype=np.float64)[first]
+        positions, found = self._find(hashes)
+        self.clock += 1
+        self.values[positions[found]] = fitness[found]
+        self.stamps[positions[found]] = self.clock
+
+        new = ~found
+        # The hashes are sorted, so inserting them at their positions keeps the keys sorted.
+        self.keys = np.insert(self.keys, positions[new], hashes[new])
+        self.values = np.insert(self.values, positions[new], fitness[new])
+        self.stamps = np.insert(self.stamps, positions[new], self.clock)
+
+        excess = len(self.keys) - self.max_size
+        if excess > 0:
+            evicted = np.argpartition(self.stamps, excess - 1)[:excess] if excess < len(self.keys) else slice(None)
+            keep = np.ones(len(self.keys), dtype=bool)
+            keep[evicted] = False
+            self.keys, self.values, self.stamps = self.keys[keep], self.values[keep], self.stamps[keep]
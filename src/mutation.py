@@ -1,26 +1,120 @@
 import numpy as np
-import random
+from profiling import count
 
-def mutation_by_change(offspring, pm):
+def _edges_cost_batch(routes, positions, valid, distance_matrix):
     """
-    Perform mutation by swapping two random genes in the offspring with a given probability.
+    Sums the edges (routes[r, k], routes[r, k + 1]) for every position k in row r of
+    `positions` where `valid` is set. Positions that fall outside the route are ignored, so
+    moves can pass i - 1 or j without checking whether i is the first gene or j the last one.
+    """
+
+    n = routes.shape[1]
+    valid = valid & (positions >= 0) & (positions < n - 1)
+    positions = np.clip(positions, 0, n - 2)
+    rows = np.arange(len(routes))[:, None]
+    cost = distance_matrix[routes[rows, positions], routes[rows, positions + 1]]
+    return np.where(valid, cost, 0).sum(axis=1)
+
+def _swap_moves(columns, i, j, lo, hi, rng):
+    source = np.broadcast_to(columns, (len(i), len(columns))).copy()
+    rows = np.arange(len(i))
+    source[rows, lo], source[rows, hi] = hi, lo
+    # When the genes are adjacent the edge between them is both lo and hi - 1.
+    positions = np.stack([lo - 1, lo, hi - 1, hi], axis=1)
+    valid = np.ones_like(positions, dtype=bool)
+    valid[:, 2] = hi - 1 != lo
+    return source, positions, positions, valid
+
+def _inversion_moves(columns, i, j, lo, hi, rng):
+    in_segment = (columns >= lo[:, None]) & (columns <= hi[:, None])
+    source = np.where(in_segment, (lo + hi)[:, None] - columns, columns)
+    positions = np.stack([lo - 1, hi], axis=1)
+    return source, positions, positions, np.ones_like(positions, dtype=bool)
+
+def _insertion_moves(columns, i, j, lo, hi, rng):
+    forward = (i < j)[:, None]
+    shifted = (columns >= lo[:, None]) & (columns <= hi[:, None])
+    source = np.where(shifted, np.where(forward, columns + 1, columns - 1), columns)
+    source[np.arange(len(i)), j] = i
+    before = np.where(forward, np.stack([i - 1, i, j], axis=1), np.stack([j - 1, i - 1, i], axis=1))
+    after = np.where(forward, np.stack([i - 1, j - 1, j], axis=1), np.stack([j - 1, j, i], axis=1))
+    return source, before, after, np.ones_like(before, dtype=bool)
+
+def _scramble_moves(columns, i, j, lo, hi, rng):
+    # Sorting keys: positions outside the segment keep their own index as key, positions
+    # inside get random keys in [lo, hi + 1), so argsort shuffles only the segment.
+    in_segment = (columns >= lo[:, None]) & (columns <= hi[:, None])
+    keys = lo[:, None] + rng.random((len(i), len(columns))) * (hi - lo + 1)[:, None]
+    source = np.argsort(np.where(in_segment, keys, columns), axis=1)
+    # Every edge inside the segment may change, so the whole window is re-evaluated.
+    window = lo[:, None] - 1 + columns
+    valid = window <= hi[:, None]
+    return source, window, window, valid
+
+# Every operator receives the column indices, the two drawn positions (i, j and their
+# sorted lo, hi) and the generator, and returns the source index map of the mutated
+# routes plus the edge positions to compare before and after the move.
+MUTATION_OPERATORS = {
+    "swap": _swap_moves,
+    "inversion": _inversion_moves,
+    "insertion": _insertion_moves,
+    "scramble": _scramble_moves,
+}
+
+def mutate(offspring, pm, distance_matrix, operator="swap", rng=None):
+    """
+    Mutate a population of offspring in a few array operations.
+    The mutated individuals are picked with a single random mask and every move is 
+    described as an index map over the route, so all of them are applied with one 
+    gather. The cached fitness is updated in place from the edges affected by each move.
     Parameters:
-        offspring (list of lists): The population of offspring to be mutated. Each offspring is 
-                                   represented as a list of genes.
+        offspring (Population): The evaluated population of offspring to be mutated.
         pm (float): The probability of mutation for each offspring.
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        operator (str): One of the keys of MUTATION_OPERATORS: swap, inversion (the 2-opt 
+                        move), insertion or scramble.
+        rng (numpy.random.Generator): The random number generator to use.
     Returns:
-        (list of lists): The mutated population of offspring.
+        (Population): The mutated population of offspring.
     """
-    
-    rd_values = np.random.rand(len(offspring))
 
-    for i in range(len(offspring)):
-        if rd_values[i] > pm:
-            continue
+    rng = np.random.default_rng() if rng is None else rng
+    moves = MUTATION_OPERATORS[operator]
+    n = offspring.chromosomes.shape[1]
 
-        rd_indices = random.sample(range(0, len(offspring[i])), 2)
-        offspring[i][rd_indices[0]], offspring[i][rd_indices[1]] = offspring[i][rd_indices[1]], offspring[i][rd_indices[0]]
-    
+    selected = np.flatnonzero(rng.random(len(offspring)) < pm)
+    if len(selected) == 0 or n < 2:
+        return offspring
+
+    # Two distinct positions per mutated individual.
+    i = rng.integers(0, n, len(selected))
+    j = (i + rng.integers(1, n, len(selected))) % n
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+
+    routes = offspring.chromosomes[selected]
+    source, before, after, valid = moves(np.arange(n), i, j, lo, hi, rng)
+    mutated = np.take_along_axis(routes, source, axis=1)
+
+    delta = (_edges_cost_batch(mutated, after, valid, distance_matrix)
+             - _edges_cost_batch(routes, before, valid, distance_matrix))
+    offspring.chromosomes[selected] = mutated
+    offspring.fitness[selected] += delta.astype(offspring.fitness.dtype)
+    count("delta_evaluations", len(selected))
     return offspring
 
-    
\ No newline at end of file
+def mutation_by_change(offspring, pm, distance_matrix, rng=None):
+    """
+    Perform mutation by swapping two random genes in the offspring with a given probability.
+    The cached fitness of every mutated offspring is updated in place with the delta of
+    the swap, so mutated offspring do not need to be evaluated again.
+    Parameters:
+        offspring (Population): The evaluated population of offspring to be mutated. Each
+                                offspring is represented as a row of city indices.
+        pm (float): The probability of mutation for each offspring.
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+        rng (numpy.random.Generator): The random number generator to use.
+    Returns:
+        (Population): The mutated population of offspring.
+    """
+
+    return mutate(offspring, pm, distance_matrix, "swap", rng)
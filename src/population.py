@@ -0,0 +1,142 @@
+import numpy as np
+from utils import evaluate_population
+from profiling import stage, count
+from memo import tour_hashes
+
+class Population:
+    """
+    A population of integer chromosomes together with their cached fitness.
+    Fitness is computed once, when chromosomes enter the population, and is carried along
+    by every operation that selects or combines individuals, so survivors are never
+    evaluated again.
+    Attributes:
+        chromosomes (numpy.ndarray): A (pop_size, n) array of city indices.
+        fitness (numpy.ndarray): A (pop_size,) array with the total distance of each chromosome.
+        evaluations (int): The number of chromosomes whose fitness was computed in full to
+                           produce this population: those of `from_chromosomes` that were not
+                           found in the memo, or the offspring evaluated by `ga.next_generation`.
+                           0 for a population made of already evaluated individuals.
+    """
+
+    def __init__(self, chromosomes, fitness, evaluations=0):
+        self.chromosomes = np.asarray(chromosomes)
+        self.fitness = np.asarray(fitness)
+        self.evaluations = evaluations
+
+        if len(self.chromosomes) != len(self.fitness):
+            raise ValueError("Every chromosome needs exactly one fitness value.")
+
+    @classmethod
+    def from_chromosomes(cls, chromosomes, distance_matrix, memo=None):
+        """
+        Builds a population from new chromosomes, evaluating each of them once.
+        Args:
+            chromosomes (numpy.ndarray): A (pop_size, n) array of city indices.
+            distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+            memo (FitnessMemo): Optional cache of the fitness of known tours; only the
+                                chromosomes missing from it are evaluated.
+        Returns:
+            (Population): The evaluated population.
+        """
+
+        with stage("evaluation"):
+            if memo is None:
+                count("fitness_evaluations", len(chromosomes))
+                return cls(chromosomes, evaluate_population(chromosomes, distance_matrix), len(chromosomes))
+
+            chromosomes = np.asarray(chromosomes)
+            hashes = tour_hashes(chromosomes)
+            cached, found = memo.lookup(hashes)
+            missing = np.flatnonzero(~found)
+            # Only the misses are gathered; when every tour is a miss they are evaluated in place.
+            fitness = evaluate_population(chromosomes if len(missing) == len(chromosomes) else chromosomes[missing],
+                                          distance_matrix)
+            count("fitness_evaluations", len(missing))
+            memo.store(hashes[missing], fitness)
+
+            result = np.empty(len(chromosomes), dtype=fitness.dtype)
+            result[missing] = fitness
+            result[found] = cached[found]
+            return cls(chromosomes, result, len(missing))
+
+    def __len__(self):
+        return len(self.chromosomes)
+
+    def take(self, indices):
+        """
+        Returns a new population made of the individuals at the given indices.
+        """
+
+        return Population(self.chromosomes[indices], self.fitness[indices])
+
+    def extend(self, other):
+        """
+        Returns a new population containing the individuals of both populations.
+        """
+
+        return Population(np.concatenate([self.chromosomes, other.chromosomes]),
+                          np.concatenate([self.fitness, other.fitness]))
+
+def _quantile(values, positions, q):
+    # Linear interpolation between the order statistics around (len - 1) * q, as np.quantile.
+    h = (len(positions) - 1) * q
+    lo, hi = int(np.floor(h)), int(np.ceil(h))
+    return values[positions[lo]] + (h - lo) * (values[positions[hi]] - values[positions[lo]])
+
+def population_statistics(population, sample_size=0, diversity=True):
+    """
+    Computes the per-generation statistics of a population in one pass over its cached fitness.
+    All the order statistics (best, quartiles, median, worst and the evenly spaced sample) are
+    placed by a single `np.argpartition`, so nothing is sorted or evaluated again.
+    Args:
+        population (Population): The population, with its cached fitness.
+        sample_size (int): The number of evenly spaced order statistics to return, for plotting.
+        diversity (bool): Whether to compute the edge diversity, which reads every chromosome.
+    Returns:
+        (dict): best_index, median_index and worst_index (the median is the upper one, at
+                len // 2 in fitness order), min, q1, median, q3, max, mean, std,
+                coefficient_of_variation, fitness_sample and, if requested, edge_diversity:
+                the mean fraction of the edges of each chromosome that the best one lacks.
+    """
+
+    fitness = population.fitness
+    size = len(fitness)
+    quartiles = [int(np.floor((size - 1) * q)) for q in (0.25, 0.75)] + [int(np.ceil((size - 1) * q)) for q in (0.25, 0.75)]
+    sample = np.linspace(0, size - 1, sample_size).round().astype(np.int64)
+    kth = np.unique(np.concatenate([[0, size // 2, size - 1], quartiles, sample]))
+    order = np.empty(size, dtype=np.int64)
+    order[kth] = np.argpartition(fitness, kth)[kth]
+
+    mean = fitness.mean(dtype=np.float64)
+    std = fitness.std(dtype=np.float64)
+    statistics = {
+        "best_index": order[0],
+        "median_index": order[size // 2],
+        "worst_index": order[size - 1],
+        "min": fitness[order[0]],
+        "q1": _quantile(fitness, order, 0.25),
+        "median": fitness[order[size // 2]],
+        "q3": _quantile(fitness, order, 0.75),
+        "max": fitness[order[size - 1]],
+        "mean": mean,
+        "std": std,
+        "coefficient_of_variation": std / mean if mean else 0.0,
+        "fitness_sample": fitness[order[sample]],
+    }
+
+    if diversity:
+        chromosomes = population.chromosomes
+        n = chromosomes.shape[1]
+        best = chromosomes[order[0]]
+        if n < 2:
+            statistics["edge_diversity"] = 0.0
+        else:
+            # Tours are open paths; an edge is shared when it appears in either direction.
+            following = np.full(n, -1, dtype=np.int64)
+            preceding = np.full(n, -1, dtype=np.int64)
+            following[best[:-1]] = best[1:]
+            preceding[best[1:]] = best[:-1]
+            a, b = chromosomes[:, :-1], chromosomes[:, 1:]
+            shared = (following[a] == b) | (preceding[a] == b)
+            statistics["edge_diversity"] = 1.0 - shared.mean()
+    return statistics
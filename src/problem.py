@@ -0,0 +1,121 @@
+import numpy as np
+from utils import evaluate_chromosome
+
+class TSPProblem:
+    """
+    A TSP instance where every city is addressed by its integer index.
+    City names are mapped to indices once, at construction, and the distances are kept in
+    a compact dense matrix. Chromosomes are integer permutations of range(n_cities); names
+    are only needed again when a route is shown to the user.
+    Attributes:
+        city_names (list of str): The city names, in matrix order.
+        city_to_index (dict): Maps each city name to its row/column in the distance matrix.
+        distance_matrix (numpy.ndarray): A (n, n) int16, int32 or float32 matrix of distances. It
+                                         may be a read-only memory-mapped array.
+        coordinates (numpy.ndarray): The (n, 2) coordinates of the cities, or None if the instance
+                                     only has distances.
+    """
+
+    def __init__(self, city_names, distance_matrix, coordinates=None):
+        self.city_names = list(city_names)
+        self.city_to_index = {city: idx for idx, city in enumerate(self.city_names)}
+        self.distance_matrix = compact_distance_matrix(distance_matrix)
+        self.coordinates = None if coordinates is None else np.asarray(coordinates, dtype=np.float64)
+
+        if self.distance_matrix.shape != (len(self.city_names), len(self.city_names)):
+            raise ValueError("The distance matrix must be square and match the number of cities.")
+
+    @classmethod
+    def from_adjacency_list(cls, adjacency_list):
+        """
+        Builds a problem from an adjacency list such as `utils.dist`.
+        When some pairs of cities have no direct edge, the distance between them is the length
+        of the shortest path (the metric closure of the graph, cached on disk), so a tour never
+        uses a missing edge. Only the edges are gathered, so the one dense matrix built is the
+        final distance matrix.
+        Args:
+            adjacency_list (dict): A dictionary where keys are city names and values are lists of
+                                   (distance, neighbor) tuples.
+        Returns:
+            (TSPProblem): The problem instance.
+        """
+
+        # instances imports this module, so it is imported here.
+        from instances import adjacency_list_edges, edges_distance_matrix
+
+        city_names = list(adjacency_list.keys())
+        edges = adjacency_list_edges(city_names, adjacency_list)
+        return cls(city_names, edges_distance_matrix(len(city_names), *edges))
+
+    @property
+    def n_cities(self):
+        return len(self.city_names)
+
+    def to_indices(self, route):
+        """
+        Translates a route of city names into an integer chromosome.
+        """
+
+        return np.array([self.city_to_index[city] for city in route], dtype=np.int32)
+
+    def to_names(self, chromosome):
+        """
+        Translates an integer chromosome back into a list of city names.
+        """
+
+        return [self.city_names[i] for i in chromosome]
+
+    def evaluate(self, chromosome):
+        """
+        Evaluates the total distance of a single integer chromosome in O(n).
+        """
+
+        return evaluate_chromosome(chromosome, self.distance_matrix)
+
+COMPACT_DTYPES = (np.int16, np.int32, np.float32)
+
+def smallest_distance_dtype(max_distance, integral=True):
+    """
+    Returns the smallest dtype used by the solver that can hold distances up to `max_distance`.
+    Only signed types are used, so differences of distances never wrap around.
+    Args:
+        max_distance (float): The largest distance of the instance.
+        integral (bool): Whether all the distances are integers.
+    Returns:
+        (numpy.dtype): int16, int32 or float32.
+    """
+
+    if integral:
+        for dtype in (np.int16, np.int32):
+            if max_distance <= np.iinfo(dtype).max:
+                return np.dtype(dtype)
+    return np.dtype(np.float32)
+
+def compact_distance_matrix(distance_matrix):
+    """
+    Converts a distance matrix to the smallest dtype used by the solver.
+    Matrices that already use one of COMPACT_DTYPES are returned as they are, without being
+    scanned, so memory-mapped matrices are neither copied nor read. Floating-point matrices
+    whose distances are all whole numbers get an integer dtype.
+    Args:
+        distance_matrix (array-like): A square matrix of distances.
+    Returns:
+        (numpy.ndarray): A C-contiguous int16, int32 or float32 matrix.
+    Raises:
+        ValueError: If a floating-point matrix has infinite (missing) or NaN distances.
+    """
+
+    distance_matrix = np.asarray(distance_matrix)
+
+    if distance_matrix.dtype in COMPACT_DTYPES:
+        return np.ascontiguousarray(distance_matrix)
+
+    integral = np.issubdtype(distance_matrix.dtype, np.integer)
+    if not integral:
+        # Missing edges are infinite; the solver's delta evaluation needs finite distances.
+        if not np.isfinite(distance_matrix).all():
+            raise ValueError("The distance matrix has missing edges; build its metric closure "
+                             "with instances.metric_closure first.")
+        integral = bool(np.all(distance_matrix == np.round(distance_matrix)))
+    max_distance = np.abs(distance_matrix).max() if distance_matrix.size else 0
+    return np.ascontiguousarray(distance_matrix, dtype=smallest_distance_dtype(max_distance, integral))
@@ -0,0 +1,176 @@
+import functools
+import json
+from contextlib import nullcontext
+from time import perf_counter
+
+GENERATION_STAGE = "generation"
+
+# Returned by `stage` while profiling is disabled: entering and leaving it does nothing.
+_NULL_STAGE = nullcontext()
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit(self.name, self.start, perf_counter() - self.start)
+
+class Profiler:
+    """
+    Nestable stage timers and counters, aggregated per run and per generation.
+    Stages are identified by their path, e.g. "main/generation/crossover", so the same
+    stage name can appear under different parents. When profiling is disabled `stage`
+    returns a shared no-op context manager and `count` returns immediately.
+    Attributes:
+        enabled (bool): Whether stages and counters are recorded.
+        trace (bool): Whether every stage is also kept as an event, for `to_chrome_trace`.
+        totals (dict): Maps each stage path to [calls, seconds].
+        counters (dict): Maps each counter name to its value.
+        generations (list of dict): The seconds per stage and the counter increments of every
+                                    "generation" stage.
+    """
+
+    def __init__(self, enabled=False, trace=False):
+        self.enabled = enabled
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        self.totals = {}
+        self.counters = {}
+        self.generations = []
+        self.events = []
+        self._stack = []
+        self._snapshots = []
+        self._origin = perf_counter()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _enter(self, name):
+        self._stack.append(name)
+        if name == GENERATION_STAGE:
+            self._snapshots.append(({path: total[1] for path, total in self.totals.items()}, dict(self.counters)))
+
+    def _exit(self, name, start, elapsed):
+        path = "/".join(self._stack)
+        self._stack.pop()
+        total = self.totals.setdefault(path, [0, 0.0])
+        total[0] += 1
+        total[1] += elapsed
+
+        if self.trace:
+            self.events.append((name, start - self._origin, elapsed, len(self._stack)))
+
+        if name == GENERATION_STAGE and self._snapshots:
+            seconds, counters = self._snapshots.pop()
+            self.generations.append({
+                "seconds": elapsed,
+                "stages": {p: t[1] - seconds.get(p, 0.0) for p, t in self.totals.items()
+                           if p.startswith(path + "/") and t[1] != seconds.get(p, 0.0)},
+                "counters": {c: v - counters.get(c, 0) for c, v in self.counters.items() if v != counters.get(c, 0)},
+            })
+
+    def summary(self):
+        """
+        Returns the aggregated stages, counters and per-generation breakdown as a dictionary.
+        """
+
+        return {
+            "stages": {path: {"calls": calls, "seconds": seconds} for path, (calls, seconds) in sorted(self.totals.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "generations": self.generations,
+        }
+
+    def report(self):
+        """
+        Returns a text table of the time spent in each stage, followed by the counters.
+        """
+
+        lines = []
+        roots = sum(seconds for path, (_, seconds) in self.totals.items() if "/" not in path) or 1.0
+        for path, (calls, seconds) in sorted(self.totals.items()):
+            name = "  " * path.count("/") + path.rsplit("/", 1)[-1]
+            lines.append("{:<40} {:>9} calls {:>11.5f} sec {:>6.1%}".format(name, calls, seconds, seconds / roots))
+        for name, value in sorted(self.counters.items()):
+            lines.append("{:<40} {:>9}".format(name, value))
+        return "\n".join(lines)
+
+    def to_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def to_chrome_trace(self, path):
+        """
+        Writes the recorded stages in the Chrome trace event format (chrome://tracing, Perfetto).
+        Stages are only kept as events when the profiler was created or enabled with trace=True.
+        """
+
+        events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": elapsed * 1e6, "pid": 0, "tid": 0,
+                   "args": {"depth": depth}}
+                  for name, start, elapsed, depth in self.events]
+        end = max((event["ts"] + event["dur"] for event in events), default=0)
+        events += [{"name": name, "ph": "C", "ts": end, "pid": 0, "tid": 0, "args": {name: value}}
+                   for name, value in self.counters.items()]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+PROFILER = Profiler()
+
+def stage(name):
+    """
+    Times a block of code as a stage of the global profiler: `with stage("crossover"): ...`
+    """
+
+    return PROFILER.stage(name)
+
+def count(name, amount=1):
+    """
+    Adds `amount` to a counter of the global profiler.
+    """
+
+    PROFILER.count(name, amount)
+
+def enable(trace=False):
+    """
+    Starts recording on the global profiler, discarding anything recorded before.
+    """
+
+    PROFILER.enabled = True
+    PROFILER.trace = trace
+    PROFILER.reset()
+
+def disable():
+    PROFILER.enabled = False
+
+def profiler(method):
+    """
+    Decorator that times a function as a top-level stage and prints how long it took.
+    When profiling is enabled the stage breakdown is printed as well.
+    """
+
+    @functools.wraps(method)
+    def wrapper_method(*arg, **kw):
+        t = perf_counter()
+        with stage(method.__name__):
+            ret = method(*arg, **kw)
+        print("Method " + method.__name__ + " took : " + "{:2.5f}".format(perf_counter() - t) + " sec")
+        if PROFILER.enabled:
+            print(PROFILER.report())
+        return ret
+
+    return wrapper_method
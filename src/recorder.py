@@ -0,0 +1,167 @@
+import os
+from time import perf_counter
+import numpy as np
+from profiling import stage
+from population import population_statistics
+
+MAGIC = b"GATSPRUN"
+VERSION = 3
+HEADER_SIZE = 64
+CHUNK_SIZE = 64
+SAMPLE_SIZE = 16
+
+def record_dtype(n_cities):
+    """
+    Returns the dtype of one generation record of a run on `n_cities` cities.
+    Every record has a fixed size, so a run file is a header followed by an array of records.
+    """
+
+    return np.dtype([
+        ("generation", "<i8"),
+        ("elapsed", "<f8"),          # Seconds since the start of the run.
+        ("generation_time", "<f8"),  # Seconds spent on this generation.
+        ("min", "<f8"),
+        ("q1", "<f8"),
+        ("median", "<f8"),
+        ("q3", "<f8"),
+        ("max", "<f8"),
+        ("mean", "<f8"),
+        ("std", "<f8"),
+        ("edge_diversity", "<f8"),   # Mean fraction of edges not shared with the best tour.
+        ("fitness_sample", "<f8", (SAMPLE_SIZE,)),  # Evenly spaced order statistics, for plotting.
+        ("best_tour", "<i4", (n_cities,)),
+        ("median_tour", "<i4", (n_cities,)),
+        ("worst_tour", "<i4", (n_cities,)),
+    ])
+
+def generation_records(generations, start=None):
+    """
+    Turns a stream of (generation, population) pairs into generation records.
+    Only the statistics of each generation are kept, so the stream can be arbitrarily long.
+    Args:
+        generations (iterable): Yields (generation number, Population) pairs, e.g. `ga.evolve`.
+        start (float): The `perf_counter` value at the start of the run, defaults to now.
+    Yields:
+        (numpy.ndarray): A record of `record_dtype`, as an array of length one.
+    """
+
+    start = perf_counter() if start is None else start
+    last = start
+    for generation, population in generations:
+        now = perf_counter()
+        with stage("statistics"):
+            statistics = population_statistics(population, SAMPLE_SIZE)
+
+            record = np.zeros(1, dtype=record_dtype(population.chromosomes.shape[1]))
+            record["generation"] = generation
+            record["elapsed"] = now - start
+            record["generation_time"] = now - last
+            for field in ("min", "q1", "median", "q3", "max", "mean", "std", "edge_diversity", "fitness_sample"):
+                record[field] = statistics[field]
+            record["best_tour"] = population.chromosomes[statistics["best_index"]]
+            record["median_tour"] = population.chromosomes[statistics["median_index"]]
+            record["worst_tour"] = population.chromosomes[statistics["worst_index"]]
+        last = now
+        yield record
+
+def stream(records, *callbacks):
+    """
+    Passes every record to each of the callbacks, in order, and returns the last record.
+    """
+
+    record = None
+    for record in records:
+        for callback in callbacks:
+            callback(record)
+    return record
+
+class RunRecorder:
+    """
+    Appends generation records to a run file, writing them in chunks.
+    At most `chunk_size` records are held in memory, so the memory used does not grow with
+    the number of generations. The file can be read while the run is still going, with
+    `open_run`, and is opened in append mode so an existing run can be continued.
+    """
+
+    def __init__(self, path, n_cities, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.dtype = record_dtype(n_cities)
+        self.buffer = np.zeros(chunk_size, dtype=self.dtype)
+        self.buffered = 0
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            header = MAGIC + np.array([VERSION, n_cities], dtype="<i8").tobytes()
+            with open(path, "wb") as file:
+                file.write(header.ljust(HEADER_SIZE, b"\0"))
+        elif _read_header(path) != n_cities:
+            raise ValueError("The run file " + path + " was recorded for a different number of cities.")
+
+    def __call__(self, record):
+        self.buffer[self.buffered] = record[0] if record.shape else record
+        self.buffered += 1
+        if self.buffered == len(self.buffer):
+            self.flush()
+
+    @property
+    def records(self):
+        """
+        The number of records appended so far, written or still buffered.
+        """
+
+        return (os.path.getsize(self.path) - HEADER_SIZE) // self.dtype.itemsize + self.buffered
+
+    def truncate(self, records):
+        """
+        Drops every record after the first `records`, e.g. those written after the checkpoint
+        a run is resumed from.
+        Raises:
+            ValueError: If the file holds fewer records, e.g. it belongs to another run.
+        """
+
+        self.flush()
+        if records > self.records:
+            raise ValueError("The run file " + self.path + " holds " + str(self.records) + " records, fewer than the "
+                             + str(records) + " of the checkpoint.")
+        os.truncate(self.path, HEADER_SIZE + records * self.dtype.itemsize)
+
+    def flush(self):
+        if self.buffered:
+            with open(self.path, "ab") as file:
+                file.write(self.buffer[:self.buffered].tobytes())
+            self.buffered = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _read_header(path):
+    with open(path, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        raise ValueError(path + " is not a run file.")
+    version, n_cities = np.frombuffer(header[8:24], dtype="<i8")
+    if version != VERSION:
+        raise ValueError("Unsupported run file version: " + str(version))
+    return int(n_cities)
+
+def open_run(path):
+    """
+    Memory-maps the records of a run file.
+    Args:
+        path (str): The path of the run file.
+    Returns:
+        (numpy.memmap): A read-only structured array of `record_dtype` with one record per
+                        generation; fields such as run["median"] or run["best_tour"] are read
+                        from disk on demand.
+    """
+
+    dtype = record_dtype(_read_header(path))
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
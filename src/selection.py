@@ -1,61 +1,75 @@
 import numpy as np
-from utils import evaluate_chromosome
+from population import population_statistics
+
+def truncation_selection(population, size):
+    """
+    Selects the `size` individuals with the lowest fitness.
+    The fitness array is partitioned with `np.argpartition` in O(n) instead of being sorted,
+    so the survivors are not returned in fitness order.
+    Args:
+        population (Population): The population, with its cached fitness.
+        size (int): The number of individuals to keep.
+    Returns:
+        (Population): The best `size` individuals.
+    """
+
+    if size >= len(population):
+        return population
+    if size <= 0:
+        return population.take(np.arange(0))
+    return population.take(np.argpartition(population.fitness, size - 1)[:size])
 
 def best_performer_selection(population):
     """
     Selects the best performing half of the population based on their fitness scores.
     Args:
-        population (list): A list of chromosomes representing the population.
+        population (Population): The population, with its cached fitness.
     Returns:
-        list: A list containing the top 50% of the population based on fitness.
+        (Population): The top 50% of the population based on fitness, in no particular order.
     """
     
-    fitness = [evaluate_chromosome(chromosome) for chromosome in population]
-    sorted_population = [x for _, x in sorted(zip(fitness, population))]
-    return sorted_population[:len(population) // 2]
+    return truncation_selection(population, len(population) // 2)
 
-def tournament_selection(population, size, tournament_size):
+def tournament_selection(population, size, tournament_size, rng=None):
     """
     Perform tournament selection on a given population.
     Args:
-        population (list): A list of chromosomes representing the population.
+        population (Population): The population, with its cached fitness.
         size (int): The number of chromosomes to select.
         tournament_size (int): The number of chromosomes to compete in each tournament.
+        rng (numpy.random.Generator): The random number generator to use.
     Returns:
-        (list): A list of the selected chromosomes.
+        (numpy.ndarray): A (size, n) array of the selected chromosomes.
     """
 
-    selected = []
-    for _ in range(size):
-        tournament = np.random.choice(population, tournament_size, replace=True)
-        tournament_fitness = [evaluate_chromosome(chromosome) for chromosome in tournament]
-        winner_index = np.argmin(tournament_fitness)
-        selected.append(tournament[winner_index])
-    return selected
+    rng = np.random.default_rng() if rng is None else rng
+    # All the tournaments at once: one row of contestants per selected chromosome.
+    contestants = rng.integers(0, len(population), (size, tournament_size))
+    winners = np.argmin(population.fitness[contestants], axis=1)
+    return population.chromosomes[contestants[np.arange(size), winners]]
 
 def select_med_chromosome(population):
     """
     Selects the median chromosome from a given population based on their fitness.
     Args:
-        population (list): A list of chromosomes, where each chromosome is a list or any other iterable.
+        population (Population): The population, with its cached fitness.
     Returns:
         tuple: A tuple containing:
             - The median chromosome from the sorted population.
             - The fitness value of the median chromosome.
-            - The list of fitness values for the entire population.
+            - The array of fitness values for the entire population.
     """
 
-    fitness = [evaluate_chromosome(chromosome) for chromosome in population]
-    sorted_population = [x for _, x in sorted(zip(fitness, population))]
-    sorted_fitness = sorted(fitness)
+    fitness = population.fitness
+    med_index = population_statistics(population, diversity=False)["median_index"]
 
-    return sorted_population[len(sorted_population) // 2], sorted_fitness[len(sorted_population) // 2], fitness
+    return population.chromosomes[med_index], fitness[med_index], fitness
 
 def select_best_chromosome(population):
     """
     Selects the best and worst chromosomes from a given population based on their fitness.
     Args:
-        population (list): A list of chromosomes, where each chromosome is represented by a list or array.
+        population (Population): The population, with its cached fitness.
     Returns:
         tuple: A tuple containing:
             - The best chromosome (based on minimum fitness).
@@ -64,32 +78,37 @@ def select_best_chromosome(population):
             - The fitness value of the worst chromosome.
     """
 
-    fitness = [evaluate_chromosome(chromosome) for chromosome in population]
-    best_index = np.argmin(fitness)
-    worst_index = np.argmax(fitness)
+    fitness = population.fitness
+    statistics = population_statistics(population, diversity=False)
+    best_index, worst_index = statistics["best_index"], statistics["worst_index"]
 
-    return population[best_index], fitness[best_index], population[worst_index], fitness[worst_index]
+    return population.chromosomes[best_index], fitness[best_index], population.chromosomes[worst_index], fitness[worst_index]
 
-def fitness_proportionate_selection(population, size):
+def fitness_proportionate_selection(population, size, rng=None):
     """
     Perform fitness proportionate selection on a given population.
-    This function calculates the fitness of each chromosome in the population
-    using the `evaluate_chromosome` function from the `utils` module. It then
-    computes the selection probability for each chromosome based on their
+    This function reads the cached fitness of each chromosome in the population
+    and computes the selection probability for each chromosome based on their
     fitness values. The selection probability is inversely proportional to the
     fitness value, meaning that chromosomes with lower fitness values have
     higher selection probabilities. I used this approach because the project I've
     chosen is a minimization problem.
+    The chromosomes are drawn with stochastic universal sampling: `size` evenly spaced
+    pointers, with a single random offset, are located on the cumulative weights with one
+    `np.searchsorted`, so no normalized probability vector is built. Every chromosome is
+    selected either floor or ceil of its expected number of times.
     Args:
-        population (list): A list of chromosomes representing the population.
+        population (Population): The population, with its cached fitness.
+        size (int): The number of chromosomes to select.
+        rng (numpy.random.Generator): The random number generator to use.
     Returns:
-        (list): A list of the selected chromosomes.
+        (numpy.ndarray): A (size, n) array of the selected chromosomes.
     """
-    fitness = [evaluate_chromosome(chromosome) for chromosome in population]
-    p = [(1/f) for f in fitness]
-    total_p = sum(p)
-    p = [prob/total_p for prob in p]
-
-    selected_indices = np.random.choice(len(population), size=size, p=p, replace=True)
+    rng = np.random.default_rng() if rng is None else rng
+    cumulative = np.cumsum(1 / population.fitness.astype(np.float64))
+    step = cumulative[-1] / size
+    pointers = rng.uniform(0, step) + step * np.arange(size)
+    selected_indices = np.minimum(np.searchsorted(cumulative, pointers, side="right"), len(population) - 1)
 
-    return [population[i] for i in selected_indices]
\ No newline at end of file
+    # The pointers are sorted, so shuffle the picks before they are paired for crossover.
+    return population.chromosomes[rng.permutation(selected_indices)]
\ No newline at end of file
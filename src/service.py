@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import functools
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+import numpy as np
+from utils import hash_distance_matrix
+from problem import compact_distance_matrix
+from instances import METRICS, coordinates_distance_matrix, save_distance_matrix, load_distance_matrix
+from initialization import generate_initial_population
+from population import Population
+from ga import evolve
+from crossover import CROSSOVER_OPERATORS
+from mutation import MUTATION_OPERATORS
+from local_search import nearest_neighbors, NEIGHBORS
+from memo import FitnessMemo
+from termination import Incumbent, TimeBudget
+
+HOST = "127.0.0.1"
+PORT = 8765
+WORKERS = None  # GA worker processes; defaults to the number of CPUs.
+CACHE_DIR = os.path.join(".cache", "instances")
+PROGRESS_INTERVAL = 0.5  # Seconds between two progress lines of a streamed job.
+TIME_BUDGET = 10.0
+MAX_TIME_BUDGET = 600.0
+MAX_POP_SIZE = 10000
+MAX_BODY_SIZE = 256 * 1024 * 1024
+# Solver parameters a request may set, with their defaults.
+SOLVER_DEFAULTS = {
+    "pop_size": 200,
+    "generations": None,
+    "mutation_probability": 0.2,
+    "crossover": "ox",
+    "mutation": "swap",
+    "local_search": False,
+    "fitness_memo_size": 0,
+    "seed": None,
+}
+
+# Instances prepared by this worker process, by content hash.
+_instances = {}
+
+def instance_key(payload):
+    """
+    Returns the content hash of the instance of a request, or raises ValueError.
+    Coordinates are hashed together with their metric, matrices by their values and dtype.
+    """
+
+    if "coordinates" in payload:
+        coordinates = np.asarray(payload["coordinates"], dtype=np.float64)
+        metric = payload.get("metric", "EUCLIDEAN")
+        if coordinates.ndim != 2 or coordinates.shape[1] != 2 or metric not in METRICS:
+            raise ValueError("coordinates must be a list of [x, y] pairs and metric one of " + ", ".join(METRICS))
+        return metric + "-" + hash_distance_matrix(coordinates)
+    if "distance_matrix" in payload:
+        distance_matrix = np.asarray(payload["distance_matrix"])
+        if distance_matrix.ndim != 2 or distance_matrix.shape[0] != distance_matrix.shape[1]:
+            raise ValueError("distance_matrix must be a square matrix")
+        return "MATRIX-" + hash_distance_matrix(distance_matrix)
+    raise ValueError("the request needs either coordinates or a distance_matrix")
+
+def _cache_paths(key, cache_dir):
+    return os.path.join(cache_dir, key + ".matrix.npy"), os.path.join(cache_dir, key + ".neighbors.npy")
+
+def _save_atomically(path, array):
+    # Workers may prepare the same instance at once; each writes its own file and renames it.
+    temporary = path + "." + str(os.getpid()) + ".tmp.npy"
+    save_distance_matrix(temporary, array)
+    os.replace(temporary, path)
+
+def prepare_instance(key, payload, cache_dir=CACHE_DIR):
+    """
+    Returns the distance matrix and the candidate lists of an instance, preparing them once.
+    Prepared instances are kept in memory by every worker process, and on disk under their
+    content hash, where they are memory-mapped by the other workers and by later runs of the
+    service. `payload` is only read when the instance is not cached, so it can be None then.
+    """
+
+    if key in _instances:
+        return _instances[key]
+
+    matrix_path, neighbors_path = _cache_paths(key, cache_dir)
+    if os.path.exists(matrix_path) and os.path.exists(neighbors_path):
+        prepared = load_distance_matrix(matrix_path), load_distance_matrix(neighbors_path)
+    else:
+        if payload is None:
+            raise ValueError("instance " + key + " is not cached")
+        if "coordinates" in payload:
+            distance_matrix = coordinates_distance_matrix(payload["coordinates"], payload.get("metric", "EUCLIDEAN"))
+        else:
+            distance_matrix = compact_distance_matrix(payload["distance_matrix"])
+        neighbors = nearest_neighbors(distance_matrix, min(NEIGHBORS, max(1, len(distance_matrix) - 1)))
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_atomically(matrix_path, distance_matrix)
+        _save_atomically(neighbors_path, neighbors)
+        prepared = distance_matrix, neighbors
+
+    _instances[key] = prepared
+    return prepared
+
+def solve_job(key, payload, config, time_budget, progress=None, cache_dir=CACHE_DIR):
+    """
+    Worker process entry point: solves one instance within a time budget.
+    Args:
+        key (str): The content hash of the instance, from `instance_key`.
+        payload (dict): The instance, or None when it is already cached.
+        config (dict): Solver parameters, see SOLVER_DEFAULTS.
+        time_budget (float): The wall-clock budget of the GA, in seconds.
+        progress (queue): Optional queue receiving a progress dict every PROGRESS_INTERVAL seconds.
+        cache_dir (str): The directory of the prepared instances.
+    Returns:
+        (dict): The best tour (as city indices), its length and the run counters.
+    """
+
+    start = perf_counter()
+    config = dict(SOLVER_DEFAULTS, **config)
+    distance_matrix, neighbors = prepare_instance(key, payload, cache_dir)
+    setup = perf_counter() - start
+
+    rng = np.random.default_rng(config["seed"])
+    population = Population.from_chromosomes(
+        generate_initial_population(distance_matrix, config["pop_size"], rng, neighbors=neighbors), distance_matrix)
+    incumbent = Incumbent()
+    last = perf_counter()
+    for generation, _ in evolve(population, distance_matrix, rng, config["generations"], config["pop_size"],
+                                config["crossover"], config["mutation"], config["mutation_probability"],
+                                neighbors if config["local_search"] else None,
+                                memo=FitnessMemo(config["fitness_memo_size"]) if config["fitness_memo_size"] else None,
+                                termination=TimeBudget(time_budget), incumbent=incumbent):
+        if progress is not None and perf_counter() - last >= PROGRESS_INTERVAL:
+            last = perf_counter()
+            progress.put({"generation": generation, "best_fitness": float(incumbent.best_fitness),
+                          "elapsed": incumbent.elapsed})
+
+    best_tour, best_fitness = incumbent.best()
+    return {
+        "best_tour": best_tour.tolist(),
+        "best_fitness": float(best_fitness),
+        "generations": incumbent.generations,
+        "evaluations": incumbent.evaluations,
+        "setup_seconds": setup,
+        "seconds": perf_counter() - start,
+        "stop_reason": incumbent.stop_reason,
+    }
+
+class SolveService:
+    """
+    A local HTTP/JSON service that solves instances on a pool of GA worker processes.
+    Endpoints:
+        POST /solve: a JSON body with "coordinates" ([[x, y], ...], plus an optional "metric")
+                     or "distance_matrix", an optional "time_budget" in seconds (at most
+                     MAX_TIME_BUDGET) and the solver parameters of SOLVER_DEFAULTS. The response is newline-delimited JSON: one
+                     progress line every PROGRESS_INTERVAL seconds, then the result line. With
+                     "stream": false only the result is sent, as a single JSON document.
+        GET /health: the number of workers and of jobs in progress.
+    Jobs wait in the process pool's queue when every worker is busy. Instances are prepared
+    once per content hash; the service remembers which hashes are on disk so their
+    coordinates or matrix are not even sent to the workers again.
+    """
+
+    def __init__(self, workers=WORKERS, cache_dir=CACHE_DIR):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        # Workers are started on demand, while connections are open; forked workers would
+        # inherit the client sockets and keep them open, so they are spawned instead.
+        context = mp.get_context("spawn")
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        self.manager = context.Manager()
+        # Blocking waits on the progress queues run here, off the event loop.
+        self.waiters = ThreadPoolExecutor(max(32, 4 * self.workers))
+        self.cached = set()
+        self.jobs = 0
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.waiters.shutdown()
+        self.manager.shutdown()
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, body = await _read_request(reader)
+            if method == "GET" and path == "/health":
+                await _respond(writer, 200, {"workers": self.workers, "jobs": self.jobs})
+            elif method == "POST" and path == "/solve":
+                await self.solve(json.loads(body or b"{}"), writer)
+            else:
+                await _respond(writer, 404, {"error": "not found: " + method + " " + path})
+        except (ValueError, KeyError, TypeError) as error:
+            await _respond(writer, 400, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def solve(self, request, writer):
+        key = await asyncio.get_running_loop().run_in_executor(self.waiters, instance_key, request)
+        time_budget = float(request.get("time_budget", TIME_BUDGET))
+        # NaN would never run out, and would keep a worker busy for good.
+        if not math.isfinite(time_budget) or time_budget <= 0:
+            raise ValueError("time_budget must be a positive number of seconds")
+        time_budget = min(time_budget, MAX_TIME_BUDGET)
+        config = {name: request[name] for name in SOLVER_DEFAULTS if name in request}
+        if config.get("crossover", "ox") not in CROSSOVER_OPERATORS or config.get("mutation", "swap") not in MUTATION_OPERATORS:
+            raise ValueError("crossover must be one of " + ", ".join(CROSSOVER_OPERATORS)
+                             + " and mutation one of " + ", ".join(MUTATION_OPERATORS))
+        pop_size = int(config.get("pop_size", 2))
+        if pop_size % 2 or not 2 <= pop_size <= MAX_POP_SIZE:
+            raise ValueError("pop_size must be even, between 2 and " + str(MAX_POP_SIZE))
+        stream = request.get("stream", True)
+        payload = None if key in self.cached else {name: request[name] for name in
+                                                   ("coordinates", "metric", "distance_matrix") if name in request}
+
+        progress = self.manager.Queue() if stream else None
+        loop = asyncio.get_running_loop()
+        self.jobs += 1
+        try:
+            job = loop.run_in_executor(self.pool, functools.partial(
+                solve_job, key, payload, config, time_budget, progress, self.cache_dir))
+            if stream:
+                writer.write(_headers(200, "application/x-ndjson"))
+                while not job.done():
+                    update = await loop.run_in_executor(self.waiters, _next_update, progress)
+                    if update is not None:
+                        writer.write(json.dumps(update).encode() + b"\n")
+                        await writer.drain()
+            try:
+                result = await job
+            except Exception as error:
+                # E.g. a cached instance whose files were removed; it is prepared again next time.
+                self.cached.discard(key)
+                if not stream:
+                    raise ValueError(str(error))
+                writer.write(json.dumps({"error": str(error)}).encode() + b"\n")
+                await writer.drain()
+                return
+            self.cached.add(key)
+            result["instance"] = key
+
+            if stream:
+                writer.write(json.dumps(result).encode() + b"\n")
+                await writer.drain()
+            else:
+                await _respond(writer, 200, result)
+        finally:
+            self.jobs -= 1
+
+def _next_update(progress, timeout=0.1):
+    try:
+        return progress.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) < 2:
+        raise ValueError("malformed request line")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_SIZE:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return request_line[0].upper(), request_line[1].split("?", 1)[0], body
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+def _headers(status, content_type, length=None):
+    # Without a Content-Length the response ends when the connection closes, which lets
+    # progress lines be streamed as they come.
+    lines = ["HTTP/1.1 %d %s" % (status, _REASONS[status]), "Content-Type: " + content_type, "Connection: close"]
+    if length is not None:
+        lines.append("Content-Length: %d" % length)
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+async def _respond(writer, status, document):
+    body = json.dumps(document).encode()
+    writer.write(_headers(status, "application/json", len(body)) + body)
+    await writer.drain()
+
+async def serve(host=HOST, port=PORT, workers=WORKERS, cache_dir=CACHE_DIR):
+    service = SolveService(workers, cache_dir)
+    server = await asyncio.start_server(service.handle, host, port)
+    print("Serving on http://%s:%d with %d workers" % (host, port, service.workers))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve GA solves over a local HTTP/JSON API.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="GA worker processes")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="directory of the prepared instances")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.cache_dir))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import threading
+from time import perf_counter
+import numpy as np
+
+class Incumbent:
+    """
+    The best tour found so far by a run, readable at any moment (anytime API).
+    `ga.evolve` updates it after every generation; other threads can call `best` or
+    `request_stop` while the run is going. Termination policies read its counters.
+    Attributes:
+        generations (int): The number of generations completed.
+        evaluations (int): The number of chromosomes evaluated in full, including the initial
+                           population. Memo hits and the delta updates of mutation and local
+                           search are not evaluations.
+        improved_at (int): The generation count at the last improvement of the best fitness.
+        stop_reason (str): The policy that stopped the run, once it has stopped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.best_tour = None
+        self.best_fitness = np.inf
+        self.generations = 0
+        self.evaluations = 0
+        self.improved_at = 0
+        self.stop_reason = None
+        self.start = perf_counter()
+
+    @property
+    def elapsed(self):
+        return perf_counter() - self.start
+
+    def update(self, population, evaluations=0):
+        """
+        Records a completed generation and the chromosomes evaluated to produce it.
+        """
+
+        best_index = np.argmin(population.fitness)
+        with self._lock:
+            self.evaluations += evaluations
+            if population.fitness[best_index] < self.best_fitness:
+                self.best_fitness = population.fitness[best_index]
+                self.best_tour = population.chromosomes[best_index].copy()
+                self.improved_at = self.generations
+
+    def best(self):
+        """
+        Returns:
+            tuple: A copy of the best tour found so far (None before the first update) and its fitness.
+        """
+
+        with self._lock:
+            return (None if self.best_tour is None else self.best_tour.copy()), self.best_fitness
+
+    def request_stop(self):
+        """
+        Asks the run to stop after the generation in progress.
+        """
+
+        self._stop.set()
+
+    @property
+    def stop_requested(self):
+        return self._stop.is_set()
+
+class Termination:
+    """
+    Base class of the termination policies.
+    A policy is asked, before every generation, whether the run should stop. Policies can be
+    combined with `|` (stop when any of them says so) and `&` (stop when all of them do).
+    """
+
+    def should_stop(self, incumbent):
+        raise NotImplementedError
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __repr__(self):
+        return type(self).__name__ + "(" + ", ".join(str(value) for value in vars(self).values()) + ")"
+
+class MaxGenerations(Termination):
+    def __init__(self, generations):
+        self.generations = generations
+
+    def should_stop(self, incumbent):
+        return incumbent.generations >= self.generations
+
+class Stagnation(Termination):
+    """
+    Stops when the best fitness has not improved for `generations` generations.
+    """
+
+    def __init__(self, generations):
+        self.generations = generations
+
+    def should_stop(self, incumbent):
+        return incumbent.generations - incumbent.improved_at >= self.generations
+
+class TimeBudget(Termination):
+    """
+    Stops once `seconds` of wall-clock time have passed since the incumbent was created.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def should_stop(self, incumbent):
+        return incumbent.elapsed >= self.seconds
+
+class EvaluationBudget(Termination):
+    """
+    Stops once `evaluations` chromosomes have been evaluated in full (see `Incumbent.evaluations`).
+    """
+
+    def __init__(self, evaluations):
+        self.evaluations = evaluations
+
+    def should_stop(self, incumbent):
+        return incumbent.evaluations >= self.evaluations
+
+class TargetLength(Termination):
+    """
+    Stops as soon as a tour at most `length` long has been found.
+    """
+
+    def __init__(self, length):
+        self.length = length
+
+    def should_stop(self, incumbent):
+        return incumbent.best_fitness <= self.length
+
+class AnyOf(Termination):
+    def __init__(self, *policies):
+        self.policies = policies
+        self.fired = None
+
+    def should_stop(self, incumbent):
+        for policy in self.policies:
+            if policy.should_stop(incumbent):
+                self.fired = policy
+                return True
+        return False
+
+    def __repr__(self):
+        return " | ".join(repr(policy) for policy in self.policies)
+
+class AllOf(Termination):
+    def __init__(self, *policies):
+        self.policies = policies
+
+    def should_stop(self, incumbent):
+        return all(policy.should_stop(incumbent) for policy in self.policies)
+
+    def __repr__(self):
+        return " & ".join(repr(policy) for policy in self.policies)
+
+def termination_policy(generations=None, stagnation=None, time_budget=None, evaluation_budget=None,
+                       target_length=None):
+    """
+    Builds the policy that stops as soon as any of the given limits is reached.
+    Args:
+        generations (int): The maximum number of generations.
+        stagnation (int): The number of generations without improvement before stopping.
+        time_budget (float): The wall-clock budget, in seconds.
+        evaluation_budget (int): The maximum number of chromosome evaluations.
+        target_length (float): Stop once a tour this short has been found.
+    Returns:
+        (Termination): The combined policy, or None when no limit is given.
+    """
+
+    limits = [(MaxGenerations, generations), (Stagnation, stagnation), (TimeBudget, time_budget),
+              (EvaluationBudget, evaluation_budget), (TargetLength, target_length)]
+    policies = [policy(value) for policy, value in limits if value is not None]
+    if not policies:
+        return None
+    return policies[0] if len(policies) == 1 else AnyOf(*policies)
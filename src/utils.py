@@ -1,16 +1,9 @@
-import random
-from time import perf_counter
+import hashlib
+import os
 import numpy as np
-from sklearn.manifold import MDS
+from profiling import stage, count
 
-def profiler(method):
-    def wrapper_method(*arg, **kw):
-        t = perf_counter()
-        ret = method(*arg, **kw)
-        print("Method " + method.__name__ + " took : " + "{:2.5f}".format(perf_counter() - t) + " sec")
-        return ret
-
-    return wrapper_method
+MDS_CACHE_DIR = os.path.join(".cache", "mds")
 
 def generate_mds_coordinates(distance_matrix, city_names):
     """
@@ -31,6 +24,10 @@ def generate_mds_coordinates(distance_matrix, city_names):
     # The random_state=42 parameter ensures that the results are reproducible by setting a 
     # seed for the random number generator.
 
+    # sklearn is only imported when a layout is actually needed, so the solver itself
+    # does not pay for it at startup.
+    from sklearn.manifold import MDS
+
     mds = MDS(n_components=2, dissimilarity="precomputed", random_state=42)
 
     # This method computes the coordinates of the points in the two-dimensional space based
@@ -41,6 +38,53 @@ def generate_mds_coordinates(distance_matrix, city_names):
     # Map coordinates to city names using dictionary comprehension.
     return {city: tuple(coord) for city, coord in zip(city_names, coords)}
 
+def hash_distance_matrix(distance_matrix):
+    """
+    Computes a content hash of a distance matrix, used as a key for on-disk caches.
+    Args:
+        distance_matrix (numpy.ndarray): A 2D distance matrix.
+    Returns:
+        (str): The hex digest of the matrix dtype, shape and contents.
+    """
+
+    distance_matrix = np.ascontiguousarray(distance_matrix)
+    digest = hashlib.sha256()
+    digest.update(str(distance_matrix.dtype).encode())
+    digest.update(str(distance_matrix.shape).encode())
+    digest.update(distance_matrix.data)
+    return digest.hexdigest()
+
+def load_mds_coordinates(distance_matrix, city_names, cache_dir=MDS_CACHE_DIR):
+    """
+    Returns the MDS coordinates of the cities, computing them only once per instance.
+    The layout is stored in `cache_dir` under the hash of the distance matrix, so later
+    runs on the same instance read it from disk instead of fitting MDS again.
+    Parameters:
+        distance_matrix (2D array): A precomputed distance matrix.
+        city_names (list of str): The city names, in matrix order.
+        cache_dir (str): The directory where layouts are cached. Use None to disable the cache.
+    Returns:
+        (dict): A dictionary where the keys are city names and the values are tuples representing 
+                the coordinates in the two-dimensional space.
+    """
+
+    if cache_dir is None:
+        return generate_mds_coordinates(distance_matrix, city_names)
+
+    cache_path = os.path.join(cache_dir, hash_distance_matrix(distance_matrix) + ".npy")
+
+    if os.path.exists(cache_path):
+        count("mds_cache_hits")
+        coords = np.load(cache_path)
+    else:
+        count("mds_cache_misses")
+        with stage("mds"):
+            coords = np.array(list(generate_mds_coordinates(distance_matrix, city_names).values()))
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(cache_path, coords)
+
+    return {city: tuple(coord) for city, coord in zip(city_names, coords)}
+
 def create_distance_matrix(city_names, adjacency_list):
     """
     Creates a distance matrix between all cities and their corresponding neigbors.
@@ -49,13 +93,14 @@ def create_distance_matrix(city_names, adjacency_list):
         adjacency_list (dict): A dictionary where keys are city names and values are lists of tuples.
                                Each tuple contains a distance (float) and a neighboring city name (str).
     Returns:
-        (numpy.ndarray): A 2D numpy array representing the distance matrix, where the element at [i, j]
+        (numpy.ndarray): A 2D float64 array representing the distance matrix, where the element at [i, j]
                          is the distance between city i and city j. If there is no direct path between
-                         two cities, the distance is set to infinity.
+                         two cities, the distance is set to infinity; the diagonal is 0.
     """
 
     n = len(city_names)
-    distance_matrix = np.full((n, n), 0)
+    distance_matrix = np.full((n, n), np.inf)
+    np.fill_diagonal(distance_matrix, 0)
     
     city_to_index = {city: idx for idx, city in enumerate(city_names)}
 
@@ -67,37 +112,53 @@ def create_distance_matrix(city_names, adjacency_list):
     
     return distance_matrix
 
-def generate_population(population_size):
+def generate_population(population_size, n_cities, rng=None):
     """
     Generates a population of chromosomes for a genetic algorithm.
     Args:
         population_size (int): The number of chromosomes to generate.
+        n_cities (int): The number of cities in the problem.
+        rng (numpy.random.Generator): The random number generator to use.
     Returns:
-        (list): A list of chromosomes, where each chromosome is a list of cities in random order.
+        (numpy.ndarray): A (population_size, n_cities) int32 array, where each row is a random
+                         permutation of the city indices.
     """
 
-    population = []
+    rng = np.random.default_rng() if rng is None else rng
+    population = np.empty((population_size, n_cities), dtype=np.int32)
     for i in range(population_size):
-        population.append(list(dist.keys()))
-        random.shuffle(population[i])
+        population[i] = rng.permutation(n_cities)
     return population
 
-def evaluate_chromosome(chromosome):
+def evaluate_chromosome(chromosome, distance_matrix):
     """
     Evaluates the total distance of a given chromosome (route).
     Args:
-        chromosome (list): A list of cities representing a route.
+        chromosome (array-like): A permutation of city indices representing a route.
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
+    Returns:
+        (int): The total distance of the route. A route that uses a missing edge (an infinite
+               distance, see `create_distance_matrix`) is infinitely long, never shorter.
+    """
+
+    chromosome = np.asarray(chromosome)
+    return distance_matrix[chromosome[:-1], chromosome[1:]].sum()
+
+def evaluate_population(population, distance_matrix):
+    """
+    Evaluates the total distance of every chromosome in a population at once.
+    All the edges of all the routes are gathered from the distance matrix with a single
+    fancy-indexing operation and then summed row by row.
+    Args:
+        population (numpy.ndarray): A (pop_size, n) array of city indices.
+        distance_matrix (numpy.ndarray): The (n, n) distance matrix of the problem.
     Returns:
-        (int): The total distance of the route.
+        (numpy.ndarray): A (pop_size,) array with the total distance of each route, infinite for
+                         routes that use a missing edge.
     """
 
-    distance = 0
-    for i in range(len(chromosome) - 1):
-        for pair in dist[chromosome[i]]:
-            if pair[1] == chromosome[i + 1]:
-                distance += pair[0]
-                break
-    return distance
+    population = np.asarray(population)
+    return distance_matrix[population[:, :-1], population[:, 1:]].sum(axis=1)
 
 dist = {
     'London': [(344, 'Paris'),
@@ -0,0 +1,23 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The modules live flat in src/ and import each other by name, as when running from there.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+def random_distance_matrix(n, rng, dtype=np.int32):
+    """
+    Returns a symmetric (n, n) matrix of random integer distances with a zero diagonal.
+    """
+
+    upper = np.triu(rng.integers(1, 1000, size=(n, n)), 1)
+    return (upper + upper.T).astype(dtype)
+
+def is_permutation(chromosomes):
+    n = chromosomes.shape[1]
+    return bool(np.all(np.sort(chromosomes, axis=1) == np.arange(n)))
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(1234)
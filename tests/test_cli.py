@@ -0,0 +1,49 @@
+import csv
+import json
+import numpy as np
+import pytest
+import main
+import cli
+
+def test_solve_runs_the_same_ga_as_main():
+    config = {"generations": 15, "pop_size": 20, "seed": 5}
+    problem, incumbent = main.run(config)
+    result = cli.solve(config)
+    assert result["best_fitness"] == incumbent.best_fitness
+    assert result["best_tour"] == problem.to_names(incumbent.best()[0])
+    assert result["evaluations"] == incumbent.evaluations
+
+def test_odd_population_size_is_rejected():
+    with pytest.raises(ValueError):
+        cli.solve({"generations": 1, "pop_size": 21})
+
+def test_random_population_sizes_are_even():
+    rng = np.random.default_rng(0)
+    points = cli.random_points({"pop_size": {"min": 51, "max": 99, "integer": True, "step": 2}}, 200, rng)
+    sizes = np.array([point["pop_size"] for point in points])
+    assert np.all(sizes % 2 == 0)
+    assert sizes.min() >= 52 and sizes.max() <= 98
+
+def test_random_range_without_a_multiple_of_the_step_is_rejected():
+    with pytest.raises(ValueError):
+        cli.random_points({"pop_size": {"min": 51, "max": 51.5, "step": 2}}, 1, np.random.default_rng(0))
+
+def test_single_run_uses_the_seed(capsys):
+    cli.main_cli(["--set", "generations=5", "--set", "pop_size=20", "--seed", "3"])
+    expected = cli.solve({"generations": 5, "pop_size": 20, "seed": 3})
+    assert "Best distance: " + str(expected["best_fitness"]) in capsys.readouterr().out
+
+def test_config_file_population_sizes_are_even(tmp_path):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"generations": 1, "sweep": {"random": {"pop_size": {"min": 11, "max": 21}},
+                                                              "samples": 4, "seed": 1}}))
+    output = tmp_path / "runs.csv"
+    cli.main_cli(["--config", str(config), "--workers", "1", "--output", str(output)])
+    with open(output) as file:
+        sizes = [int(row["pop_size"]) for row in csv.DictReader(file)]
+    assert len(sizes) == 4 and all(size % 2 == 0 for size in sizes)
+
+def test_odd_population_size_fails_before_the_sweep_runs(capsys):
+    with pytest.raises(SystemExit):
+        cli.main_cli(["--grid", "pop_size=20,21", "--set", "generations=1"])
+    assert "21" in capsys.readouterr().err
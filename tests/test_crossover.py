@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from conftest import is_permutation
+from utils import generate_population
+from crossover import CROSSOVER_OPERATORS
+
+PERMUTATION_OPERATORS = ("ox", "pmx", "erx")
+
+@pytest.mark.parametrize("operator", PERMUTATION_OPERATORS)
+@pytest.mark.parametrize("n", [2, 3, 14, 101])
+def test_offspring_are_permutations(operator, n, rng):
+    parents = generate_population(40, n, rng)
+    children = CROSSOVER_OPERATORS[operator](parents, rng)
+    assert children.shape == parents.shape
+    assert children.dtype == parents.dtype
+    assert is_permutation(children)
+
+@pytest.mark.parametrize("operator", PERMUTATION_OPERATORS)
+def test_identical_parents_give_copies(operator, rng):
+    parent = rng.permutation(30).astype(np.int32)
+    parents = np.tile(parent, (10, 1))
+    children = CROSSOVER_OPERATORS[operator](parents, rng)
+    assert np.array_equal(children, parents)
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pytest
+import instances
+from utils import dist, create_distance_matrix
+from problem import TSPProblem
+from instances import load_instance, load_csv_coordinates
+
+def write_coordinates(path, coordinates):
+    path.write_text("name,x,y\n" + "".join(f"c{i},{x},{y}\n" for i, (x, y) in enumerate(coordinates)))
+
+def test_csv_is_read_once(tmp_path, monkeypatch):
+    path = tmp_path / "cities.csv"
+    write_coordinates(path, [(0, 0), (3, 4), (6, 8)])
+    calls = []
+    read = instances._read_csv_rows
+    monkeypatch.setattr(instances, "_read_csv_rows", lambda p: calls.append(p) or read(p))
+
+    problem = load_instance(str(path))
+    assert len(calls) == 1
+    assert problem.distance_matrix[0, 2] == 10
+
+def test_matrix_cache_is_reused_for_the_same_instance(tmp_path):
+    path, matrix_path = tmp_path / "cities.csv", str(tmp_path / "cities.npy")
+    write_coordinates(path, [(0, 0), (3, 4), (6, 8)])
+
+    load_instance(str(path), matrix_path)
+    modified = np.load(matrix_path).copy()
+    modified[0, 1] = modified[1, 0] = 7
+    np.save(matrix_path, modified)
+    # The cache was built from this file, so it is memory-mapped as is.
+    assert load_instance(str(path), matrix_path).distance_matrix[0, 1] == 7
+
+def test_stale_matrix_cache_is_rebuilt(tmp_path):
+    path, matrix_path = tmp_path / "cities.csv", str(tmp_path / "cities.npy")
+    write_coordinates(path, [(0, 0), (3, 4), (6, 8)])
+    load_instance(str(path), matrix_path)
+
+    write_coordinates(path, [(0, 0), (5, 12), (0, 1)])
+    assert load_instance(str(path), matrix_path).distance_matrix[0, 1] == 13
+    # A different metric gives a different matrix from the same file.
+    assert load_csv_coordinates(str(path), "EUC_2D", matrix_path).distance_matrix.dtype == np.int16
+
+def test_cache_without_source_key_is_rebuilt(tmp_path):
+    path, matrix_path = tmp_path / "cities.csv", str(tmp_path / "cities.npy")
+    write_coordinates(path, [(0, 0), (3, 4)])
+    np.save(matrix_path, np.zeros((2, 2), dtype=np.int16))
+    assert load_instance(str(path), matrix_path).distance_matrix[0, 1] == 5
+
+def test_complete_adjacency_list_keeps_its_distances():
+    problem = TSPProblem.from_adjacency_list(dist)
+    assert np.array_equal(problem.distance_matrix, create_distance_matrix(problem.city_names, dist))
+
+def test_incomplete_adjacency_list_uses_shortest_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path_graph = {"a": [(1, "b")], "b": [(2, "c")], "c": [(3, "d")], "d": []}
+    problem = TSPProblem.from_adjacency_list(path_graph)
+    assert problem.distance_matrix.tolist() == [[0, 1, 3, 6], [1, 0, 2, 5], [3, 2, 0, 3], [6, 5, 3, 0]]
+    assert len(os.listdir(instances.CLOSURE_CACHE_DIR)) == 1
+
+def test_incomplete_csv_edges_use_the_closure_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "roads.csv").write_text("from,to,distance\na,b,1\nb,c,2\nc,d,3\n")
+    first = load_instance("roads.csv").distance_matrix
+    assert len(os.listdir(instances.CLOSURE_CACHE_DIR)) == 1
+    assert np.array_equal(load_instance("roads.csv").distance_matrix, first)
+    assert first[0, 3] == 6
+
+def test_disconnected_graph_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError):
+        TSPProblem.from_adjacency_list({"a": [(1, "b")], "b": [], "c": [(1, "d")], "d": []})
+
+@pytest.mark.parametrize("text", ["from,to,distance\n1,2,5\n2,3,4\n3,4,1\n",  # Header.
+                                  "1,2,5\n1,3,4\n2,3,1\n"])  # A city repeated in the first column.
+def test_csv_edges_with_numeric_cities(tmp_path, text):
+    path = tmp_path / "edges.csv"
+    path.write_text(text)
+    problem = load_instance(str(path))
+    assert problem.n_cities == 3 + text.startswith("from")
+    assert problem.city_names[:2] == ["1", "2"] and problem.distance_matrix[0, 1] == 5
+
+def test_csv_format_can_be_forced(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text("1,2,5\n2,3,4\n3,4,1\n")
+    assert load_instance(str(path)).n_cities == 3
+    problem = load_instance(str(path), csv_format="edges")
+    assert problem.n_cities == 4
+    assert problem.distance_matrix[0, 1] == 5
+    with pytest.raises(ValueError):
+        load_instance(str(path), csv_format="matrix")
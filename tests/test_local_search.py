@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from conftest import random_distance_matrix, is_permutation
+from utils import generate_population, evaluate_population
+from population import Population
+from local_search import local_search, nearest_neighbors
+
+def coordinates_distance_matrix(n, rng):
+    points = rng.random((n, 2)) * 1000
+    return np.rint(np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2))).astype(np.int32)
+
+@pytest.mark.parametrize("n", [3, 4, 5, 12, 60])
+@pytest.mark.parametrize("k", [1, 4, 8])
+def test_local_search_never_lengthens_a_tour(n, k, rng):
+    for distance_matrix in (random_distance_matrix(n, rng), coordinates_distance_matrix(n, rng)):
+        chromosomes = generate_population(30, n, rng)
+        before = evaluate_population(chromosomes, distance_matrix)
+        improved = local_search(Population.from_chromosomes(chromosomes.copy(), distance_matrix),
+                                distance_matrix, nearest_neighbors(distance_matrix, min(k, n - 1)))
+        after = evaluate_population(improved.chromosomes, distance_matrix)
+
+        assert is_permutation(improved.chromosomes)
+        assert np.all(after <= before)
+        assert np.array_equal(improved.fitness, after)
+
+def test_single_move_is_an_improvement(rng):
+    distance_matrix = coordinates_distance_matrix(40, rng)
+    chromosomes = generate_population(30, 40, rng)
+    before = evaluate_population(chromosomes, distance_matrix)
+    improved = local_search(Population.from_chromosomes(chromosomes, distance_matrix),
+                            distance_matrix, nearest_neighbors(distance_matrix, 8), max_iterations=1)
+    assert np.all(improved.fitness < before)
+
+def test_a_scan_applies_several_moves(rng):
+    distance_matrix = coordinates_distance_matrix(200, rng)
+    chromosomes = generate_population(30, 200, rng)
+    neighbors = nearest_neighbors(distance_matrix, 8)
+    single = local_search(Population.from_chromosomes(chromosomes.copy(), distance_matrix),
+                          distance_matrix, neighbors, max_iterations=1, max_moves=1)
+    several = local_search(Population.from_chromosomes(chromosomes.copy(), distance_matrix),
+                           distance_matrix, neighbors, max_iterations=1)
+    assert np.array_equal(several.fitness, evaluate_population(several.chromosomes, distance_matrix))
+    assert np.all(several.fitness < single.fitness)
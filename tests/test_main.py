@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pytest
+import main
+from recorder import RunRecorder, open_run
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    # main writes its run file, checkpoint and plots to the working directory.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "SEED", 7)
+    monkeypatch.setattr(main, "POP_SIZE", 20)
+    return tmp_path
+
+def test_run_that_stops_before_the_first_generation(run_dir, monkeypatch, capsys):
+    monkeypatch.setattr(main, "TARGET_LENGTH", 10 ** 9)
+    main.main(headless=True, plots=True)
+
+    output = capsys.readouterr().out
+    assert "Stopped after 0 generations" in output
+    assert len(open_run(main.RUN_FILE)) == 0
+    assert not os.path.exists("dispersion.html")
+
+def test_resumed_run_matches_an_uninterrupted_run(run_dir, monkeypatch):
+    monkeypatch.setattr(main, "CHECKPOINT_GENERATIONS", 10)
+    monkeypatch.setattr(main, "GENERATIONS", 60)
+    main.main(headless=True, plots=False)
+    straight = np.array(open_run(main.RUN_FILE))
+
+    # Stop at 35; the last checkpoint is at 30 and the records after it are dropped on resume.
+    monkeypatch.setattr(main, "GENERATIONS", 35)
+    main.main(headless=True, plots=False)
+    assert len(open_run(main.RUN_FILE)) == 35
+    monkeypatch.setattr(main, "GENERATIONS", 60)
+    main.main(headless=True, plots=False, resume=True)
+    resumed = np.array(open_run(main.RUN_FILE))
+
+    assert len(resumed) == len(straight) == 60
+    for field in straight.dtype.names:
+        if field not in ("elapsed", "generation_time"):
+            assert np.array_equal(resumed[field], straight[field]), field
+
+def test_new_run_drops_the_previous_checkpoint(run_dir, monkeypatch):
+    monkeypatch.setattr(main, "CHECKPOINT_GENERATIONS", 10)
+    monkeypatch.setattr(main, "GENERATIONS", 40)
+    main.main(headless=True, plots=False)
+    assert os.path.exists(main.CHECKPOINT)
+
+    # The new run stops before its first checkpoint, so there is nothing to resume.
+    monkeypatch.setattr(main, "GENERATIONS", 5)
+    main.main(headless=True, plots=False)
+    assert not os.path.exists(main.CHECKPOINT)
+    monkeypatch.setattr(main, "GENERATIONS", 45)
+    with pytest.raises(FileNotFoundError):
+        main.main(headless=True, plots=False, resume=True)
+    assert len(open_run(main.RUN_FILE)) == 5
+
+def test_truncate_rejects_a_shorter_run_file(tmp_path):
+    with RunRecorder(str(tmp_path / "run.garun"), 10) as recorder:
+        with pytest.raises(ValueError):
+            recorder.truncate(3)
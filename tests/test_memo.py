@@ -0,0 +1,44 @@
+import numpy as np
+from conftest import random_distance_matrix
+from utils import generate_population, evaluate_population
+from population import Population
+from memo import FitnessMemo, canonical_tours, tour_hashes
+
+def test_reversed_tours_hash_alike(rng):
+    chromosomes = generate_population(50, 20, rng)
+    hashes = tour_hashes(chromosomes)
+    assert np.array_equal(hashes, tour_hashes(chromosomes[:, ::-1]))
+    assert np.array_equal(hashes, tour_hashes(canonical_tours(chromosomes)))
+    assert len(np.unique(hashes)) == len(np.unique(canonical_tours(chromosomes), axis=0))
+
+def test_rotated_tours_hash_differently(rng):
+    chromosomes = generate_population(50, 20, rng)
+    assert not np.any(tour_hashes(chromosomes) == tour_hashes(np.roll(chromosomes, 1, axis=1)))
+
+def test_memo_returns_stored_fitness(rng):
+    memo = FitnessMemo()
+    hashes = tour_hashes(generate_population(10, 8, rng))
+    memo.store(hashes[:6], np.arange(6.0))
+    fitness, found = memo.lookup(hashes)
+    assert np.array_equal(found, [True] * 6 + [False] * 4)
+    assert np.array_equal(fitness[:6], np.arange(6.0))
+    assert np.isnan(fitness[6:]).all()
+
+def test_memo_evicts_least_recently_used(rng):
+    memo = FitnessMemo(4)
+    hashes = tour_hashes(generate_population(6, 8, rng))
+    memo.store(hashes[:4], np.zeros(4))
+    memo.lookup(hashes[:2])
+    memo.store(hashes[4:], np.ones(2))
+    assert len(memo) == 4
+    _, found = memo.lookup(hashes)
+    assert np.array_equal(found, [True, True, False, False, True, True])
+
+def test_memoized_population_matches_evaluation(rng):
+    distance_matrix = random_distance_matrix(12, rng)
+    memo = FitnessMemo(100)
+    for _ in range(5):
+        chromosomes = generate_population(40, 12, rng)
+        chromosomes[::2] = chromosomes[0]
+        population = Population.from_chromosomes(chromosomes, distance_matrix, memo)
+        assert np.array_equal(population.fitness, evaluate_population(chromosomes, distance_matrix))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from conftest import random_distance_matrix, is_permutation
+from utils import generate_population, evaluate_chromosome
+from population import Population
+from mutation import MUTATION_OPERATORS, mutate
+
+@pytest.mark.parametrize("operator", list(MUTATION_OPERATORS))
+@pytest.mark.parametrize("n", [2, 3, 4, 30])
+def test_mutated_routes_are_permutations(operator, n, rng):
+    distance_matrix = random_distance_matrix(n, rng)
+    offspring = Population.from_chromosomes(generate_population(50, n, rng), distance_matrix)
+    mutated = mutate(offspring, 1.0, distance_matrix, operator, rng)
+    assert is_permutation(mutated.chromosomes)
+
+@pytest.mark.parametrize("operator", list(MUTATION_OPERATORS))
+@pytest.mark.parametrize("n", [2, 3, 4, 30])
+def test_delta_fitness_matches_full_evaluation(operator, n, rng):
+    distance_matrix = random_distance_matrix(n, rng)
+    offspring = Population.from_chromosomes(generate_population(50, n, rng), distance_matrix)
+    for _ in range(5):
+        offspring = mutate(offspring, 1.0, distance_matrix, operator, rng)
+    expected = [evaluate_chromosome(route, distance_matrix) for route in offspring.chromosomes]
+    assert np.array_equal(offspring.fitness, expected)
+
+@pytest.mark.parametrize("operator", list(MUTATION_OPERATORS))
+def test_delta_fitness_on_float_distances(operator, rng):
+    distance_matrix = (rng.random((20, 20)) * 100).astype(np.float32)
+    distance_matrix = (distance_matrix + distance_matrix.T) / 2
+    np.fill_diagonal(distance_matrix, 0)
+    offspring = Population.from_chromosomes(generate_population(50, 20, rng), distance_matrix)
+    offspring = mutate(offspring, 1.0, distance_matrix, operator, rng)
+    expected = [evaluate_chromosome(route, distance_matrix) for route in offspring.chromosomes]
+    assert np.allclose(offspring.fitness, expected, rtol=1e-4)
+
+def test_zero_probability_leaves_offspring_unchanged(rng):
+    distance_matrix = random_distance_matrix(10, rng)
+    chromosomes = generate_population(20, 10, rng)
+    offspring = mutate(Population.from_chromosomes(chromosomes.copy(), distance_matrix), 0.0, distance_matrix, "swap", rng)
+    assert np.array_equal(offspring.chromosomes, chromosomes)
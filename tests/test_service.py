@@ -0,0 +1,61 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+import service
+from service import SolveService, instance_key, prepare_instance
+
+COORDINATES = [[0, 0], [3, 0], [3, 4], [0, 4], [1, 2], [2, 1]]
+
+def test_instance_key_depends_on_the_content():
+    key = instance_key({"coordinates": COORDINATES})
+    assert instance_key({"coordinates": [list(point) for point in COORDINATES]}) == key
+    assert instance_key({"coordinates": COORDINATES, "metric": "EUC_2D"}) != key
+    assert instance_key({"coordinates": COORDINATES[::-1]}) != key
+    with pytest.raises(ValueError):
+        instance_key({})
+
+def test_prepared_instance_is_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "_instances", {})
+    key = instance_key({"coordinates": COORDINATES})
+    distance_matrix, neighbors = prepare_instance(key, {"coordinates": COORDINATES}, str(tmp_path))
+    # Kept in memory, so the payload is not needed again.
+    assert prepare_instance(key, None, str(tmp_path))[0] is distance_matrix
+
+    # Another worker, or a later run of the service, reads it back from disk.
+    monkeypatch.setattr(service, "_instances", {})
+    cached_matrix, cached_neighbors = prepare_instance(key, None, str(tmp_path))
+    assert np.array_equal(cached_matrix, distance_matrix)
+    assert np.array_equal(cached_neighbors, neighbors)
+    with pytest.raises(ValueError):
+        prepare_instance("EUCLIDEAN-missing", None, str(tmp_path))
+
+async def _post(port, document):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(document).encode()
+    writer.write(b"POST /solve HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def test_solve_round_trip(tmp_path):
+    async def requests():
+        solver = SolveService(workers=1, cache_dir=str(tmp_path))
+        server = await asyncio.start_server(solver.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with server:
+                request = {"coordinates": COORDINATES, "time_budget": 0.2, "pop_size": 20, "seed": 1, "stream": False}
+                return [await _post(port, request),
+                        await _post(port, dict(request, time_budget=float("nan"))),
+                        await _post(port, dict(request, pop_size=service.MAX_POP_SIZE + 2))]
+        finally:
+            solver.close()
+
+    (status, result), (nan_status, _), (pop_status, _) = asyncio.run(requests())
+    assert status == 200
+    assert sorted(result["best_tour"]) == list(range(len(COORDINATES)))
+    assert result["instance"] == instance_key({"coordinates": COORDINATES})
+    assert nan_status == pop_status == 400
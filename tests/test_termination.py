@@ -0,0 +1,49 @@
+import numpy as np
+import profiling
+from conftest import random_distance_matrix
+from utils import generate_population
+from population import Population
+from memo import FitnessMemo
+from ga import evolve
+from termination import Incumbent, EvaluationBudget
+
+def converged_population(distance_matrix, pop_size, rng):
+    # Every individual is the same tour, so most offspring repeat a tour the memo has seen.
+    chromosomes = np.tile(generate_population(1, len(distance_matrix), rng), (pop_size, 1))
+    return Population.from_chromosomes(chromosomes, distance_matrix)
+
+def test_evaluations_exclude_memo_hits(rng):
+    distance_matrix = random_distance_matrix(20, rng)
+    population = converged_population(distance_matrix, 40, rng)
+    incumbent = Incumbent()
+    profiling.enable()
+    try:
+        for _ in evolve(population, distance_matrix, rng, 10, 40, mutation_probability=0.1,
+                        memo=FitnessMemo(), incumbent=incumbent):
+            pass
+        evaluated = profiling.PROFILER.counters["fitness_evaluations"]
+    finally:
+        profiling.disable()
+
+    assert incumbent.evaluations == 40 + evaluated
+    assert incumbent.evaluations < 40 + 10 * 40
+
+def test_evaluation_budget_counts_evaluated_tours(rng):
+    distance_matrix = random_distance_matrix(20, rng)
+    incumbent = Incumbent()
+    for _ in evolve(converged_population(distance_matrix, 40, rng), distance_matrix, rng, 1000, 40,
+                    mutation_probability=0.1, memo=FitnessMemo(), termination=EvaluationBudget(200),
+                    incumbent=incumbent):
+        pass
+
+    assert incumbent.evaluations >= 200
+    # Without the memo the budget would have lasted (200 - 40) / 40 = 4 generations.
+    assert incumbent.generations > 4
+
+def test_evaluations_without_memo(rng):
+    distance_matrix = random_distance_matrix(20, rng)
+    incumbent = Incumbent()
+    population = Population.from_chromosomes(generate_population(40, 20, rng), distance_matrix)
+    for _ in evolve(population, distance_matrix, rng, 5, 40, incumbent=incumbent):
+        pass
+    assert incumbent.evaluations == 40 + 5 * 40